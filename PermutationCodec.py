@@ -0,0 +1,140 @@
+'''
+ABOUT
+'''
+
+# Author: Matthieu DE MARI
+# Email: matthieu.de.mari@gmail.com
+# Version: 1.0
+# Notes: Ranking and unranking of permutations, using the ordering of get_nth_permutation.
+# The rank n of a permutation of seq is written in the factorial number system, as digits d_k in [0, k - 1]
+# (n = d_2 + 2*d_3 + 2*3*d_4 + ...), and the permutation is obtained by inserting seq[-1], seq[-2], ..., seq[0]
+# one by one into an initially empty list, seq[-k] being inserted at index d_k (d_1 = 0).
+# Ranks are taken modulo len(seq)!, as in get_nth_permutation.
+# Free slots are kept in a sorted list: selecting or locating a slot is a single C-level list operation
+# (pop, or bisect and delete), which beats a pure Python O(log n) tree for any practical deck size.
+# Exhaustive traversals can also follow Heap's order, where consecutive permutations differ by a single transposition.
+
+'''
+IMPORTS
+'''
+
+from bisect import bisect_left
+import math
+
+
+'''
+CODEC FUNCTIONS
+'''
+
+def get_rank_digits(number_of_elements, rank):
+    
+    # Return the digits [d_1, d_2, ..., d_N] of the rank in the factorial number system (d_1 = 0)
+    digits = [0]*number_of_elements
+    for divider in range(2, number_of_elements + 1):
+        rank, digits[divider - 1] = rank // divider, rank % divider
+    return digits
+
+
+def unrank_permutation(seq, rank):
+    
+    # Return the permutation of seq with the given rank.
+    # The element inserted last (seq[0]) lies at index d_N of the final list; removing it leaves the list
+    # obtained after N - 1 insertions, so that each element seq[-k] lies at the d_k-th slot left free
+    # by the elements inserted after it.
+    seq = list(seq)
+    number_of_elements = len(seq)
+    digits = get_rank_digits(number_of_elements, rank)
+    free_slots = list(range(number_of_elements))
+    permutation = [None]*number_of_elements
+    for k in range(number_of_elements, 0, -1):
+        permutation[free_slots.pop(digits[k - 1])] = seq[number_of_elements - k]
+    return permutation
+
+
+def rank_permutation(permutation, seq):
+    
+    # Return the rank (between 0 and len(seq)! - 1) of a permutation of seq.
+    # Inverse of unrank_permutation: each digit d_k is the number of slots before seq[-k] left free
+    # by the elements inserted after it.
+    seq = list(seq)
+    permutation = list(permutation)
+    number_of_elements = len(seq)
+    error_str = "The permutation should contain the same elements as the sequence."
+    assert sorted(permutation) == sorted(seq), error_str
+    position_of_element = {element: slot for slot, element in enumerate(permutation)}
+    free_slots = list(range(number_of_elements))
+    digits = [0]*number_of_elements
+    for k in range(number_of_elements, 0, -1):
+        digits[k - 1] = bisect_left(free_slots, position_of_element[seq[number_of_elements - k]])
+        del free_slots[digits[k - 1]]
+    rank = 0
+    place_value = 1
+    for divider in range(2, number_of_elements + 1):
+        rank += digits[divider - 1]*place_value
+        place_value *= divider
+    return rank
+
+
+def iterate_permutations(seq, first_rank, count):
+    
+    # Yield the permutations of seq with consecutive ranks first_rank, ..., first_rank + count - 1 (as lists).
+    # Going from rank n to rank n + 1 increments the lowest digit d_k that can be incremented and resets
+    # d_2, ..., d_(k-1) to 0: only the elements seq[-k], ..., seq[-1] move, and only within the slots they
+    # already occupy. Only those slots are re-decoded, which costs O(1) amortized per permutation.
+    seq = list(seq)
+    number_of_elements = len(seq)
+    digits = get_rank_digits(number_of_elements, first_rank)
+    permutation = unrank_permutation(seq, first_rank)
+    # Slot of seq[-k], stored at index k - 1
+    slot_of_element = [0]*number_of_elements
+    for slot, element_index in enumerate(get_insertion_order(seq, permutation)):
+        slot_of_element[element_index] = slot
+    for _ in range(count):
+        yield list(permutation)
+        # Increment the rank
+        k = 2
+        while k <= number_of_elements and digits[k - 1] == k - 1:
+            digits[k - 1] = 0
+            k += 1
+        if k > number_of_elements:
+            # Wrap around, as ranks are taken modulo len(seq)!
+            k = number_of_elements
+        else:
+            digits[k - 1] += 1
+        # Re-decode the elements seq[-k], ..., seq[-1] within the slots they occupy
+        free_slots = sorted(slot_of_element[:k])
+        for j in range(k, 0, -1):
+            slot = free_slots.pop(digits[j - 1])
+            slot_of_element[j - 1] = slot
+            permutation[slot] = seq[number_of_elements - j]
+
+
+def iterate_heap_transpositions(number_of_elements):
+    
+    # Yield the len! - 1 transpositions (pairs of zero-based slots) of Heap's algorithm: applying them one after
+    # the other to any initial arrangement of number_of_elements elements goes through all its permutations once.
+    # Each loop pass either yields or resets one counter, so that the cost is O(1) amortized per transposition.
+    counters = [0]*number_of_elements
+    k = 1
+    while k < number_of_elements:
+        if counters[k] < k:
+            yield (0 if k % 2 == 0 else counters[k], k)
+            counters[k] += 1
+            k = 1
+        else:
+            counters[k] = 0
+            k += 1
+
+
+def get_insertion_order(seq, permutation):
+    
+    # Return, for each slot of the permutation, the insertion index k - 1 of the element seq[-k] it holds
+    number_of_elements = len(seq)
+    insertion_index_of_element = {element: number_of_elements - 1 - i for i, element in enumerate(seq)}
+    return [insertion_index_of_element[element] for element in permutation]
+
+
+def get_number_of_permutations(seq):
+    
+    # Return the number of distinct ranks for permutations of seq
+    return math.factorial(len(seq))
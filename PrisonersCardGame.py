@@ -11,11 +11,20 @@ ABOUT
 IMPORTS
 '''
 
+from collections import Counter, OrderedDict
 from copy import deepcopy
+from functools import cached_property, lru_cache
 from itertools import permutations
-import matplotlib.pyplot as plt
+import json
+import math
+import os
+from statistics import NormalDist
+import tempfile
+import time
 import numpy as np
-from tqdm import tqdm
+from PermutationCodec import iterate_heap_transpositions, iterate_permutations, rank_permutation, unrank_permutation
+# Note: matplotlib, tqdm and the process pool machinery are only imported when plotting, displaying progress
+# or checking in parallel, so that headless runs (e.g. batch evaluation workers) only load NumPy.
 
 
 '''
@@ -35,43 +44,350 @@ def get_nth_permutation(seq, n):
     return seqn
 
 
+def get_seed_from_permutation(permutation):
+    
+    # Return the seed (between 1 and n!) producing the given board, given as the (zero-based) card index at each position.
+    # Rank 0 is reached by seed n!, as seeds are taken modulo n! by get_nth_permutation.
+    permutation = permutation.tolist() if isinstance(permutation, np.ndarray) else list(permutation)
+    number_of_cards = len(permutation)
+    rank = rank_permutation(permutation, range(number_of_cards))
+    return rank if rank > 0 else math.factorial(number_of_cards)
+
+
+def get_game_rules(number_of_cards, maximal_revealed_number = None, maximal_swap_number = 1):
+    
+    # Check and return the number of cards, the maximal number of cards to be revealed by prisoner two
+    # (half of the cards, by default, and at least one) and the maximal number of swaps to be made by prisoner 1
+    assert int(number_of_cards) == number_of_cards and number_of_cards >= 1, "The number of cards should be a positive integer."
+    if maximal_revealed_number is None:
+        maximal_revealed_number = max(int(number_of_cards/2), 1)
+    error_str = "The maximal number of revealed cards should be an integer, at least 1."
+    assert int(maximal_revealed_number) == maximal_revealed_number and maximal_revealed_number >= 1, error_str
+    error_str = "The maximal number of swaps should be an integer, at least 0."
+    assert int(maximal_swap_number) == maximal_swap_number and maximal_swap_number >= 0, error_str
+    return int(number_of_cards), int(maximal_revealed_number), int(maximal_swap_number)
+
+
+def get_permutation_dtype(number_of_cards):
+    
+    # Return the most compact unsigned integer type able to index all the cards
+    return np.min_scalar_type(max(number_of_cards - 1, 0))
+
+
+def get_permutation_array(number_of_cards, fixed_seed):
+    
+    # Return the board encoded by fixed_seed, as a compact array giving the (zero-based)
+    # index of the card placed at each (zero-based) position (same ordering as get_nth_permutation)
+    mixed_sequence = unrank_permutation(range(number_of_cards), fixed_seed)
+    return np.array(mixed_sequence, dtype = get_permutation_dtype(number_of_cards))
+
+
+@lru_cache(maxsize = 64)
+def get_swap_positions(number_of_cards):
+    
+    # Return the zero-based positions (rows, columns) of all swaps other than no swap, in brute force order
+    # (shared by all boards of the same number of cards, hence read-only)
+    rows, columns = np.triu_indices(number_of_cards, k = 1)
+    rows.flags.writeable = False
+    columns.flags.writeable = False
+    return rows, columns
+
+
+def invert_permutation(permutation):
+    
+    # Return the inverse permutation, giving the (zero-based) position of each card
+    inverse_permutation = np.empty_like(permutation)
+    inverse_permutation[permutation] = np.arange(len(permutation), dtype = permutation.dtype)
+    return inverse_permutation
+
+
+'''
+CYCLE DECOMPOSITION FUNCTIONS
+'''
+
+def get_cycle_decomposition(permutation):
+    
+    # Label the cycle of each position in a single pass, using a visited array.
+    # Return the cycle id of each position, the index of each position along its cycle
+    # (following position -> card at position) and the list of cycle lengths.
+    permutation = permutation.tolist() if isinstance(permutation, np.ndarray) else list(permutation)
+    number_of_cards = len(permutation)
+    cycle_ids = [-1]*number_of_cards
+    cycle_indices = [0]*number_of_cards
+    cycle_lengths = []
+    for start_position in range(number_of_cards):
+        if cycle_ids[start_position] < 0:
+            # Walk the new cycle once, labelling every position on the way
+            cycle_id = len(cycle_lengths)
+            current_position = start_position
+            cycle_length = 0
+            while cycle_ids[current_position] < 0:
+                cycle_ids[current_position] = cycle_id
+                cycle_indices[current_position] = cycle_length
+                cycle_length += 1
+                current_position = permutation[current_position]
+            cycle_lengths.append(cycle_length)
+    # Every position is visited exactly once by the walk
+    if default_instrumentation.enabled:
+        default_instrumentation.count('cycle_decompositions')
+        default_instrumentation.count('cycle_walk_steps', number_of_cards)
+    return cycle_ids, cycle_indices, cycle_lengths
+
+
+def is_permutation_solvable(permutation, maximal_revealed_number):
+    
+    # The pointer-following strategy finds every card within maximal_revealed_number
+    # reveals if and only if no cycle is longer than maximal_revealed_number
+    _, _, cycle_lengths = get_cycle_decomposition(permutation)
+    return max(cycle_lengths) <= maximal_revealed_number
+
+
+def is_permutation_solvable_by_simulation(permutation, maximal_revealed_number):
+    
+    # Reference verifier: play the pointer-following strategy for every target card, revealing at most
+    # maximal_revealed_number cards. Cards are labelled by their position in the sorted configuration, so that
+    # the position of a card in the sorted configuration is the card index itself
+    permutation = permutation.tolist() if isinstance(permutation, np.ndarray) else list(permutation)
+    found_card = True
+    for target_card in range(len(permutation)):
+        # Define initial position
+        current_position = target_card
+        found_card = False
+        reached_max_number = False
+        counter = 0
+        while not found_card and not reached_max_number:
+            # Retrieve card at current position
+            current_card = permutation[current_position]
+            # Increase counter
+            counter += 1
+            # Update found_card
+            found_card = current_card == target_card
+            if default_instrumentation.enabled:
+                default_instrumentation.count('simulation_walk_steps')
+            # Update reached_max_number
+            reached_max_number = not counter < maximal_revealed_number
+            # If not our card, update current position
+            current_position = current_card
+        # Check result of cyclical exploration for given start_position
+        if not found_card and reached_max_number:
+            break
+    # Otherwise, it means that the our strategy works for every possible target card!
+    return found_card
+
+
+def get_cycle_type(cycle_lengths):
+    
+    # Return the cycle type (integer partition of the number of cards) of a board, as a sorted tuple of cycle lengths
+    return tuple(sorted(cycle_lengths, reverse = True))
+
+
+def compute_cycle_type_statistics(cycle_lengths, maximal_revealed_number):
+    
+    # Compute the swap-count statistics of any board with the given cycle lengths (see count_valid_swaps_matrix)
+    m = maximal_revealed_number
+    longest_cycle = max(cycle_lengths)
+    long_cycle_lengths = [cycle_length for cycle_length in cycle_lengths if cycle_length > m]
+    if len(long_cycle_lengths) == 0:
+        # No swap, all swaps within a cycle, and swaps merging two cycles into a small enough one
+        splitting_swaps_count = sum([cycle_length*(cycle_length - 1)//2 for cycle_length in cycle_lengths])
+        cycles_per_length = Counter(cycle_lengths)
+        merging_swaps_count = 0
+        for length1, number1 in cycles_per_length.items():
+            for length2, number2 in cycles_per_length.items():
+                if length1 < length2 and length1 + length2 <= m:
+                    merging_swaps_count += number1*number2*length1*length2
+                elif length1 == length2 and 2*length1 <= m:
+                    merging_swaps_count += number1*(number1 - 1)//2*length1*length1
+        valid_swaps_count = 1 + splitting_swaps_count + merging_swaps_count
+    elif len(long_cycle_lengths) == 1:
+        # Only swaps splitting the long cycle into two small enough ones
+        valid_swaps_count = max(longest_cycle*(2*m - longest_cycle + 1), 0)//2
+    else:
+        valid_swaps_count = 0
+    return {"longest_cycle": longest_cycle,
+            "solvable_without_swap": longest_cycle <= m,
+            "valid_swaps_count": valid_swaps_count,
+            "solved": valid_swaps_count > 0,
+            "minimal_swap_number": get_minimal_swap_number(cycle_lengths, maximal_revealed_number)}
+
+
+def get_minimal_swap_number(cycle_lengths, maximal_revealed_number):
+    
+    # A swap splits at most one cycle in two, so that a cycle of length L needs at least ceil(L/m) - 1 swaps
+    # to be cut in pieces no longer than m (and this many swaps suffice, e.g. by cutting m cards at a time)
+    m = maximal_revealed_number
+    return sum([-(-cycle_length // m) - 1 for cycle_length in cycle_lengths])
+
+
+def search_swap_sequences(permutation, maximal_revealed_number, maximal_swap_number):
+    
+    # Yield sequences of at most maximal_swap_number swaps (one-based positions, applied in order) making the board solvable,
+    # shortest sequences first (the first one being as short as get_minimal_swap_number allows).
+    # Swaps merging two cycles, or splitting a cycle that is already short enough, never help: only swaps splitting
+    # a too long cycle are explored, always on the too long cycle holding the smallest position (so that each split
+    # tree is enumerated once), and branches are pruned as soon as the too long cycles need more swaps than left.
+    # Sequences are searched with increasing numbers of swaps, each search only yielding the sequences using them all.
+    permutation = permutation.tolist() if isinstance(permutation, np.ndarray) else list(permutation)
+    m = maximal_revealed_number
+    def search(swaps_left, swap_sequence):
+        cycle_ids, cycle_indices, cycle_lengths = get_cycle_decomposition(permutation)
+        if get_minimal_swap_number(cycle_lengths, m) > swaps_left:
+            return
+        long_cycle_ids = [cycle_id for cycle_id, cycle_length in enumerate(cycle_lengths) if cycle_length > m]
+        if len(long_cycle_ids) == 0:
+            # Shorter sequences were yielded by the previous searches
+            if swaps_left == 0:
+                yield tuple(swap_sequence)
+            return
+        # Positions of the first too long cycle, in cycle order
+        cycle_id = long_cycle_ids[0]
+        cycle_length = cycle_lengths[cycle_id]
+        cycle_positions = [0]*cycle_length
+        for position, position_cycle_id in enumerate(cycle_ids):
+            if position_cycle_id == cycle_id:
+                cycle_positions[cycle_indices[position]] = position
+        for idx1 in range(cycle_length - 1):
+            for idx2 in range(idx1 + 1, cycle_length):
+                # Prune splits whose pieces alone need too many swaps
+                distance = idx2 - idx1
+                if get_minimal_swap_number([distance, cycle_length - distance], m) > swaps_left - 1:
+                    continue
+                i, j = sorted((cycle_positions[idx1], cycle_positions[idx2]))
+                permutation[i], permutation[j] = permutation[j], permutation[i]
+                yield from search(swaps_left - 1, swap_sequence + [(i + 1, j + 1)])
+                permutation[i], permutation[j] = permutation[j], permutation[i]
+    _, _, cycle_lengths = get_cycle_decomposition(permutation)
+    for swap_number in range(get_minimal_swap_number(cycle_lengths, m), maximal_swap_number + 1):
+        yield from search(swap_number, [])
+
+
+def iterate_cycle_types(number_of_cards, largest_part = None):
+    
+    # Yield all cycle types (integer partitions of number_of_cards) as tuples of non-increasing cycle lengths
+    if largest_part is None:
+        largest_part = number_of_cards
+    if number_of_cards == 0:
+        yield ()
+        return
+    for part in range(min(number_of_cards, largest_part), 0, -1):
+        for other_parts in iterate_cycle_types(number_of_cards - part, part):
+            yield (part,) + other_parts
+
+
+def count_permutations_with_cycle_type(cycle_type):
+    
+    # Number of permutations with the given cycle type: n!/prod(k^m_k * m_k!), m_k being the number of cycles of length k
+    number_of_permutations = math.factorial(sum(cycle_type))
+    for cycle_length, number_of_cycles in Counter(cycle_type).items():
+        number_of_permutations //= cycle_length**number_of_cycles*math.factorial(number_of_cycles)
+    return number_of_permutations
+
+
+def compute_orbit_swap_pattern(orbit_length, max_size):
+    
+    # Return the swaps proposed for an orbit of the given length, as pairs of indices along the orbit
+    # (None meaning no swap), in the order used by Orbit.compute_all_swaps_for_orbit
+    if orbit_length == 1:
+        return [None]
+    if max_size >= orbit_length:
+        return [None] + [(idx1, idx2) for idx1 in range(orbit_length - 1) for idx2 in range(idx1 + 1, orbit_length)]
+    # Larger orbit: split it in two orbits no longer than max_size
+    swap_pattern = []
+    known_swaps = set()
+    for idx1 in range(orbit_length):
+        for i in range(idx1 + orbit_length - max_size, idx1 + max_size + 1):
+            idx2 = i % orbit_length
+            if not (idx1, idx2) in known_swaps and not (idx2, idx1) in known_swaps:
+                known_swaps.add((idx1, idx2))
+                swap_pattern.append((idx1, idx2))
+    return swap_pattern
+
+
+def check_orbit_proposals_against_brute_force(number_of_cards, maximal_revealed_number = None):
+    
+    # Exhaustive check, over all seeds, that the swaps proposed by orbit investigation are exactly
+    # the swaps found by brute force, each swap being played on a copy of the board (so that brute force can be switched off)
+    max_number_mixes = math.factorial(number_of_cards)
+    for fixed_seed in range(1, max_number_mixes + 1):
+        my_game = CardGame(number_of_cards = number_of_cards, fixed_seed = fixed_seed, print_val = False, \
+                           maximal_revealed_number = maximal_revealed_number, lazy = True)
+        brute_force_swaps = my_game.get_solving_swaps_by_simulation()
+        if set(my_game.proposed_swaps) != set(brute_force_swaps):
+            print("Mismatch for seed {}: {} (orbits) vs. {} (brute force).".format(fixed_seed, my_game.proposed_swaps, brute_force_swaps))
+            return False
+    return True
+
+
 '''
 CARD_GAME CUSTOM CLASS
 '''
 
+class LazyStageAttribute():
+    
+    def __init__(self, stage_name):
+        
+        # Name of the stage method setting the attribute
+        self.stage_name = stage_name
+        
+        
+    def __set_name__(self, owner, name):
+        
+        self.name = name
+        
+        
+    def __get__(self, instance, owner = None):
+        
+        if instance is None:
+            return self
+        # Only called while the attribute is missing from the instance: run the stage, which stores the attribute
+        # (and the other attributes it defines) in the instance, so that later accesses no longer go through here
+        default_instrumentation.run_stage(self.stage_name, getattr(instance, self.stage_name))
+        if self.name not in instance.__dict__:
+            raise AttributeError("Stage {} did not define attribute {}.".format(self.stage_name, self.name))
+        return instance.__dict__[self.name]
+    
+    
 class CardGame():
     
-    def __init__(self, number_of_cards = 8, fixed_seed = 152, try_brute_force = True, investigate_orbits = True, print_val = True):
+    # Attributes computed on first access (in lazy games), by running the stage defining them
+    card_labels = LazyStageAttribute('define_cards_list')
+    colors_number = LazyStageAttribute('define_cards_list')
+    values_number = LazyStageAttribute('define_cards_list')
+    original_permutation = LazyStageAttribute('shuffle_cards')
+    board_permutation = LazyStageAttribute('shuffle_cards')
+    original_cycle_ids = LazyStageAttribute('shuffle_cards')
+    original_cycle_indices = LazyStageAttribute('shuffle_cards')
+    original_cycle_lengths = LazyStageAttribute('shuffle_cards')
+    solving_swap_list = LazyStageAttribute('swap_brute_force_search')
+    counter_swaps = LazyStageAttribute('swap_brute_force_search')
+    solving_swap_sequence = LazyStageAttribute('swap_sequence_search')
+    list_of_orbits = LazyStageAttribute('propose_swaps_orbits')
+    larger_orbit_exists = LazyStageAttribute('propose_swaps_orbits')
+    proposing_orbits = LazyStageAttribute('propose_swaps_orbits')
+    merging_orbit_pairs = LazyStageAttribute('propose_swaps_orbits')
+    proposed_swaps = LazyStageAttribute('propose_swaps_orbits')
+    cycle_type_statistics = LazyStageAttribute('classify_cycle_type')
+    solved = LazyStageAttribute('check_if_solved')
+    
+    def __init__(self, number_of_cards = 8, fixed_seed = 152, try_brute_force = True, investigate_orbits = True, print_val = True, \
+                 cycle_type_cache = None, maximal_revealed_number = None, maximal_swap_number = 1, lazy = False):
         
-        # Check that the number of cards is valid
-        valid_numbers_of_cards = [4, 8, 16, 32]
-        assert number_of_cards in valid_numbers_of_cards, "The number of cards should be 4, 8, 16 or 32."
-        # Define number of cards
-        self.number_of_cards = number_of_cards
-        # Define the maximal number of cards to be revealed by prisoner two 
-        self.maximal_revealed_number = int(number_of_cards/2)
-        # Define the maximal number of swaps to be made by prisoner 1
-        self.maximal_swap_number = 1
+        # Define number of cards, maximal number of cards to be revealed by prisoner two and maximal number of swaps
+        # to be made by prisoner 1 (see get_game_rules)
+        self.number_of_cards, self.maximal_revealed_number, self.maximal_swap_number = \
+            get_game_rules(number_of_cards, maximal_revealed_number, maximal_swap_number)
         # Try brute force?
         self.try_brute_force = try_brute_force
         # Investigate orbits?
         self.investigate_orbits = investigate_orbits
-        if self.try_brute_force:
-            # Define solved boolean
-            self.solved = False
-            # Define solving swap
-            self.solving_swap = None
-            # Define solving swaps list
-            self.solving_swap_list = []
-        if self.investigate_orbits:
-            # List of orbits in original_board_state
-            self.list_of_orbits = []
-            # List of proposed swaps
-            self.proposed_swaps_list = []
+        # Define solving swap
+        self.solving_swap = None
+        # Cache of swap-count statistics per cycle type (shared default cache, if none is given)
+        self.cycle_type_cache = cycle_type_cache if cycle_type_cache is not None else default_cycle_type_cache
         # Print displays
         self.print_val = print_val
         # Define seed, if any is given
-        max_number_mixes = np.math.factorial(number_of_cards)
+        max_number_mixes = math.factorial(number_of_cards)
         if fixed_seed == None:
             fac = 9/10
             self.fixed_seed = int(max_number_mixes*fac + np.random.randint(1, 1000))
@@ -79,18 +395,32 @@ class CardGame():
             self.fixed_seed = int(fixed_seed)
         error_seed_str = "The seed should be an integer between 1 and {}".format(max_number_mixes)
         assert self.fixed_seed >= 1 and self.fixed_seed <= max_number_mixes, error_seed_str 
-        # Define cards to be used
-        self.define_cards_list()
+        # Lazy games only compute the board, swaps, orbits and results when first accessed
+        if not lazy:
+            self.run_all_stages()
+        
+        
+    def run_all_stages(self):
+        
+        # Define cards to be used (each stage is timed, if instrumentation is enabled)
+        default_instrumentation.run_stage('define_cards_list', self.define_cards_list)
         # Shuffle the cards
-        self.shuffle_cards()
+        default_instrumentation.run_stage('shuffle_cards', self.shuffle_cards)
         # Look for swap (if brute force search is requested)
         if self.try_brute_force:
-            self.swap_brute_force_search()
+            default_instrumentation.run_stage('swap_brute_force_search', self.swap_brute_force_search)
+        # Look for a sequence of swaps (if more than one swap is allowed)
+        if self.maximal_swap_number > 1:
+            default_instrumentation.run_stage('swap_sequence_search', self.swap_sequence_search)
         # Propose swap using orbites investigation
         if self.investigate_orbits:
-            self.propose_swaps_orbits()
+            default_instrumentation.run_stage('propose_swaps_orbits', self.propose_swaps_orbits)
+        # Retrieve swap-count statistics for the cycle type of the board
+        default_instrumentation.run_stage('classify_cycle_type', self.classify_cycle_type)
+        # Check if the game is solved
+        default_instrumentation.run_stage('check_if_solved', self.check_if_solved)
         # Display final results
-        self.display_final_results()
+        default_instrumentation.run_stage('display_final_results', self.display_final_results)
         
         
     def define_cards_list(self):
@@ -98,32 +428,81 @@ class CardGame():
         # Define cards available
         possible_colors = ['Hearts', 'Spades', 'Diamonds', 'Clubs']
         possible_values = ['A', 'K', 'Q', 'J', '10', '9', '8', '7']
+        # Other numbers of cards use integer labels, on a single row
+        if not self.number_of_cards in [4, 8, 16, 32]:
+            self.colors_number = 1
+            self.values_number = self.number_of_cards
+            self.card_labels = [int(i+1) for i in range(self.number_of_cards)]
+            return
         # Define cards colors to be used
         self.colors_number = 2 if self.number_of_cards in [4, 8] else 4
         self.colors_list = possible_colors[:self.colors_number]
         # Define cards values to be used
         self.values_number = int(self.number_of_cards/self.colors_number)
         self.value_list = possible_values[:self.values_number]
-        # Define list of cards
-        self.decklist = {"C{}".format(int(i+1)): (self.colors_list[i // self.values_number], \
-                         self.value_list[i % self.values_number]) for i in range(self.number_of_cards)}
-        # Define position dictionary
-        self.position_dictionary = {int(i+1): (int((i // self.values_number) + 1), \
-                                    int((i % self.values_number) + 1)) for i in range(self.number_of_cards)}
-        # Define sorted configuration
-        self.sorted_configuration = {int(i+1): self.decklist["C{}".format(int(i+1))] \
-                                     for i in range(self.number_of_cards)}
+        # Define list of card labels, indexed by card number (zero-based)
+        self.card_labels = [(self.colors_list[i // self.values_number], self.value_list[i % self.values_number]) \
+                            for i in range(self.number_of_cards)]
+        
+        
+    @cached_property
+    def decklist(self):
+        
+        # Define list of cards (built on demand, for display purposes)
+        return {"C{}".format(int(i+1)): self.card_labels[i] for i in range(self.number_of_cards)}
+    
+    
+    @cached_property
+    def position_dictionary(self):
+        
+        # Define position dictionary (built on demand, for display purposes)
+        return {int(i+1): (int((i // self.values_number) + 1), \
+                int((i % self.values_number) + 1)) for i in range(self.number_of_cards)}
+    
+    
+    @cached_property
+    def sorted_configuration(self):
+        
+        # Define sorted configuration (built on demand, for display purposes)
+        return {int(i+1): self.card_labels[i] for i in range(self.number_of_cards)}
+    
+    
+    @cached_property
+    def original_board_state(self):
+        
+        # Define original board state after mixup (built on demand, for display purposes)
+        return self.get_board_state(self.original_permutation)
+    
+    
+    @cached_property
+    def original_inverse_permutation(self):
+        
+        # Define inverse permutation (position of each card, built on demand)
+        return invert_permutation(self.original_permutation)
+    
+    
+    @property
+    def board_state(self):
+        
+        # Define board for later tryouts (built on demand, for display purposes)
+        return self.get_board_state(self.board_permutation)
+    
+    
+    def get_board_state(self, permutation):
+        
+        # Convert a permutation of card indices to a dictionary mapping positions to cards
+        return {int(i+1): self.card_labels[card] for i, card in enumerate(permutation.tolist())}
         
         
     def shuffle_cards(self):
         
-        # Define random perumation with fixed_seed
-        mixed_sequence = get_nth_permutation([int(i+1) for i in range(self.number_of_cards)], self.fixed_seed)
-        # Define original board state after mixup
-        self.original_board_state = {int(i+1): self.sorted_configuration[mixed_sequence[i]] \
-                                     for i in range(self.number_of_cards)}
+        # Define random permutation with fixed_seed (card index at each position)
+        self.original_permutation = get_permutation_array(self.number_of_cards, self.fixed_seed)
         # Define board (for later tryouts)
-        self.board_state = self.original_board_state.copy()
+        self.board_permutation = self.original_permutation.copy()
+        # Define cycle id of each position, index of each position along its cycle and cycle lengths of the original board,
+        # in a single pass
+        self.original_cycle_ids, self.original_cycle_indices, self.original_cycle_lengths = get_cycle_decomposition(self.original_permutation)
         # Display
         if self.print_val:
             print("A new game has started!")
@@ -136,6 +515,8 @@ class CardGame():
     
     def display_cards(self, board, title_str = None):
         
+        # Import plotting lazily
+        import matplotlib.pyplot as plt
         # Initialize figure
         fig, ax = plt.subplots(figsize = (self.colors_number*5, self.values_number))
         # Add text
@@ -162,23 +543,49 @@ class CardGame():
         if self.print_val:
             print('-----')
             print('Looking for list of possible swaps via brute force.')
-        # Otherwise, try all swaps
-        self.counter_swaps = 0
-        if not self.solved:
-            for i in range(1, self.number_of_cards + 1):
-                # Check no permutation by swapping the first card with itself, otherwise, skip the permutation
-                min_j = (i + 1)*(i > 1) + i*(i == 1)
-                for j in range(min_j, self.number_of_cards + 1):
-                    # Swap original board with given permutation
-                    self.counter_swaps += 1
-                    self.swap_board(i, j)
-                    # Check if the swap works
-                    self.solving_swap = (i, j)
-                    #print("Trying swap:", self.solving_swap)
-                    self.check_cyclical_permutations()
-                    if self.solved:
-                        self.solved = False
-                        self.solving_swap_list.append(self.solving_swap)
+        # Try all swaps (and no swap), evaluating each of them from the cycle structure of the original board,
+        # rather than by swapping a copy of the board and walking its cycles again
+        self.counter_swaps = int(self.number_of_cards*(self.number_of_cards - 1)/2 + 1)
+        self.solving_swap_list = self.neighbour_evaluator.get_solving_swaps(self.maximal_revealed_number)
+        self.solving_swap = self.solving_swap_list[0] if len(self.solving_swap_list) > 0 else None
+        # Display
+        if self.print_val:
+            print('Done.')
+            
+            
+    @cached_property
+    def neighbour_evaluator(self):
+        
+        # Evaluator of all single swaps of the original board (built on demand)
+        return NeighbourEvaluator(self.original_permutation)
+    
+    
+    def display_swap_outcomes(self):
+        
+        # Import plotting lazily
+        import matplotlib.pyplot as plt
+        # Heatmap of the longest cycle after each swap (positions are one-based), solving swaps being at most maximal_revealed_number
+        fig, ax = plt.subplots(figsize = (6, 5))
+        image = ax.imshow(self.neighbour_evaluator.longest_cycle_matrix, cmap = 'viridis', \
+                          extent = (0.5, self.number_of_cards + 0.5, self.number_of_cards + 0.5, 0.5))
+        fig.colorbar(image, ax = ax, label = 'Longest cycle after swap')
+        plt.title('Longest cycle after each swap (solvable if at most {})'.format(self.maximal_revealed_number))
+        plt.show()
+        
+        
+    def swap_sequence_search(self):
+        
+        # Sequences are only searched for when more than one swap is allowed
+        if self.maximal_swap_number <= 1:
+            self.solving_swap_sequence = None
+            return
+        # Display
+        if self.print_val:
+            print('-----')
+            print('Looking for a sequence of at most {} swaps, pruned by cycle structure.'.format(self.maximal_swap_number))
+        # Keep the first sequence found (one of the shortest ones), if any
+        swap_sequences = search_swap_sequences(self.original_permutation, self.maximal_revealed_number, self.maximal_swap_number)
+        self.solving_swap_sequence = next(swap_sequences, None)
         # Display
         if self.print_val:
             print('Done.')
@@ -186,43 +593,28 @@ class CardGame():
             
     def swap_board(self, i, j):
         
+        if default_instrumentation.enabled:
+            default_instrumentation.count('board_copies')
         if i == j:
             # No swap
-            self.board_state = self.original_board_state.copy()
+            self.board_permutation = self.original_permutation.copy()
         else:
             # Swap cards 
-            self.board_state = self.original_board_state.copy()
-            self.board_state[i], self.board_state[j] = self.original_board_state[j], self.original_board_state[i]
-        
-        
-    def check_cyclical_permutations(self):
-        
-        for start_position in self.position_dictionary.keys():
-            # Retrieve target card
-            target_card = self.decklist["C{}".format(start_position)]
-            # Define initial position
-            current_position = list(self.sorted_configuration.values()).index(target_card) + 1
-            found_card = False
-            reached_max_number = False
-            counter = 0
-            while not found_card and not reached_max_number:
-                # Retrieve card at current position
-                current_card = self.board_state[current_position]
-                # Increase counter
-                counter += 1
-                # Update found_card
-                found_card = current_card == target_card
-                # Update reached_max_number
-                reached_max_number = not counter < self.maximal_revealed_number
-                # If not our card, update current position
-                current_position = list(self.sorted_configuration.values()).index(current_card) + 1
-            # Check result of cyclical exploration for given start_position
-            if not found_card and reached_max_number:
-                break
-        # Otherwise, it means that the our strategy applied to the configuration after swap
-        # works for every possible target card!
-        if found_card:
-            self.solved = True
+            self.board_permutation = self.original_permutation.copy()
+            self.board_permutation[[i - 1, j - 1]] = self.original_permutation[[j - 1, i - 1]]
+        
+        
+    def get_solving_swaps_by_simulation(self):
+        
+        # Reference search, independent of the cycle structure: swap a copy of the original board for every swap
+        # (and no swap), and follow the pointers for every target card on the board after swap
+        solving_swaps = []
+        for swap in [(1, 1)] + [(i, j) for i in range(1, self.number_of_cards + 1) for j in range(i + 1, self.number_of_cards + 1)]:
+            self.swap_board(*swap)
+            if is_permutation_solvable_by_simulation(self.board_permutation, self.maximal_revealed_number):
+                solving_swaps.append(swap)
+        self.board_permutation = self.original_permutation.copy()
+        return solving_swaps
             
             
     def propose_swaps_orbits(self):
@@ -231,52 +623,117 @@ class CardGame():
         if self.print_val:
             print("-----")
             print('Investigating orbits and proposing swaps.')
-        # Find orbits in original_board_state
-        self.list_of_orbits = []
-        for card in self.sorted_configuration.values():
-            if not any([orbit.is_card_in_orbit(card) for orbit in self.list_of_orbits]):
-                my_orbit = Orbit(self.original_board_state, self.sorted_configuration, card)
-                self.list_of_orbits.append(my_orbit)
-        # Find if there is an orbit with length greater than half of the cards
+        # Find orbits in original_board_state, from the cycle id and index along its cycle of each position, in O(n)
+        # (cycle ids are given in order of the first position of each cycle, which is also the first card of the orbit
+        # in the sorted configuration, and the first position of the orbit)
+        permutation = self.original_permutation.tolist()
+        orbits_positions = [[0]*cycle_length for cycle_length in self.original_cycle_lengths]
+        for position, cycle_id in enumerate(self.original_cycle_ids):
+            orbits_positions[cycle_id][self.original_cycle_indices[position]] = position
+        self.list_of_orbits = [Orbit(permutation, self.card_labels, positions[0], cycle_type_cache = self.cycle_type_cache, \
+                                     maximal_revealed_number = self.maximal_revealed_number, positions_in_orbit = positions) \
+                               for positions in orbits_positions]
+        # Find if there is an orbit with length greater than the maximal number of revealed cards (half of the cards, by default)
         is_orbit_larger_than_half = [orbit.length_of_orbit() > self.maximal_revealed_number for orbit in self.list_of_orbits]
         self.larger_orbit_exists = any(is_orbit_larger_than_half)
-        if self.larger_orbit_exists:
+        self.merging_orbit_pairs = []
+        if sum(is_orbit_larger_than_half) > 1:
+            # A single swap cannot split two orbits
+            self.proposing_orbits = []
+            self.proposed_swaps = []
+        elif self.larger_orbit_exists:
             # If so, swaps are defined in a way to split this orbit in two smaller orbits
             my_orbit = self.list_of_orbits[is_orbit_larger_than_half.index(True)]
-            self.proposed_swaps_list = my_orbit.possible_swaps
-            # Otherwise, all swaps between elements of a same orbit work
+            self.proposing_orbits = [my_orbit]
+            self.proposed_swaps = my_orbit.possible_swap_positions
+            # Otherwise, all swaps between elements of a same orbit work,
+            # as well as swaps merging two orbits into one no longer than the maximal number of revealed cards
         else:
-            self.proposed_swaps_list = []
-            for orbit in self.list_of_orbits:
-                self.proposed_swaps_list.extend(orbit.possible_swaps)
+            self.proposing_orbits = self.list_of_orbits
+            proposed_swaps = set([swap for orbit in self.list_of_orbits for swap in orbit.possible_swap_positions])
+            self.merging_orbit_pairs = [(orbit1, orbit2) for idx, orbit1 in enumerate(self.list_of_orbits) \
+                                        for orbit2 in self.list_of_orbits[idx + 1:] \
+                                        if orbit1.orbit_length + orbit2.orbit_length <= self.maximal_revealed_number]
+            for orbit1, orbit2 in self.merging_orbit_pairs:
+                proposed_swaps.update(orbit1.compute_merge_swap_positions(orbit2))
             # Unique check
-            self.proposed_swaps_list = list(np.sort(np.unique(self.proposed_swaps_list))[::-1])
-            '''
-            TO BE ADDED.
-            In practice, additional swaps exist, which fusion two orbits into one of size smaller than self.maximal_revealed_number.
-            '''
+            self.proposed_swaps = sorted(proposed_swaps)
             
         # Display
         if self.print_val:
             print('Done.')
     
     
-    def check_proposed_swaps_match_with_bf(self, swap_list_str):
+    @cached_property
+    def proposed_swaps_list(self):
         
-        # Check if all proposed swaps are in the bf swaps
-        for swap in self.proposed_swaps_list:
-            # Find reversed swap
-            split = swap.split(' <-> ')
-            card1 = split[0]
-            card2 = split[1]
-            swap_rev = str(card2) + " <-> " + str(card1)
-            if swap in swap_list_str:
-                swap_list_str.remove(swap)
-            elif swap_rev in swap_list_str:
-                swap_list_str.remove(swap_rev)
-            else:
-                return False, False
-        return True, len(swap_list_str) == 0
+        # Proposed swaps as strings (built on demand, for display purposes)
+        proposed_swaps_list = [swap for orbit in self.proposing_orbits for swap in orbit.possible_swaps]
+        for orbit1, orbit2 in self.merging_orbit_pairs:
+            proposed_swaps_list.extend(orbit1.compute_merge_swaps(orbit2))
+        if self.larger_orbit_exists:
+            return proposed_swaps_list
+        # Unique check
+        return np.sort(np.unique(proposed_swaps_list))[::-1].tolist()
+    
+    
+    def classify_cycle_type(self):
+        
+        # Swap-count statistics only depend on the cycle type of the original board: reuse them from the cache, or
+        # store the ones obtained by brute force (or computed analytically, if brute force is not requested)
+        compute_statistics = self.get_brute_force_statistics if self.try_brute_force else None
+        self.cycle_type_statistics = self.cycle_type_cache.get_statistics(self.number_of_cards, self.maximal_revealed_number, \
+                                                                          self.original_cycle_lengths, compute_statistics)
+        
+        
+    def check_if_solved(self):
+        
+        # Solved without swap if no swap is allowed, if a sequence of allowed swaps works if several are allowed, or else
+        # if a single swap works (found by brute force if requested, or from the swap-count statistics of the cycle type otherwise)
+        if self.maximal_swap_number == 0:
+            self.solved = max(self.original_cycle_lengths) <= self.maximal_revealed_number
+        elif self.maximal_swap_number > 1:
+            self.solved = self.solving_swap_sequence is not None
+        elif self.try_brute_force:
+            self.solved = len(self.solving_swap_list) > 0
+        else:
+            self.solved = self.cycle_type_statistics["solved"]
+        
+        
+    def get_brute_force_statistics(self):
+        
+        # Swap-count statistics, as found by brute force
+        return {"longest_cycle": max(self.original_cycle_lengths),
+                "solvable_without_swap": (1, 1) in self.solving_swap_list,
+                "valid_swaps_count": len(self.solving_swap_list),
+                "solved": len(self.solving_swap_list) > 0,
+                "minimal_swap_number": get_minimal_swap_number(self.original_cycle_lengths, self.maximal_revealed_number)}
+    
+    
+    def check_proposed_swaps_match_with_bf(self):
+        
+        # Check if all proposed swaps are in the bf swaps, and if both match exactly (as position pairs)
+        proposed_swaps = set(self.proposed_swaps)
+        brute_force_swaps = set(self.solving_swap_list)
+        if not proposed_swaps.issubset(brute_force_swaps):
+            return False, False
+        return True, proposed_swaps == brute_force_swaps
+    
+    
+    def get_result(self):
+        
+        # Structured record of the results of the game
+        return GameResult(number_of_cards = self.number_of_cards,
+                          fixed_seed = self.fixed_seed,
+                          maximal_revealed_number = self.maximal_revealed_number,
+                          maximal_swap_number = self.maximal_swap_number,
+                          solved = bool(self.solved),
+                          longest_cycle = self.cycle_type_statistics["longest_cycle"],
+                          valid_swaps_count = self.cycle_type_statistics["valid_swaps_count"],
+                          minimal_swap_number = self.cycle_type_statistics["minimal_swap_number"],
+                          solving_swaps = tuple(self.solving_swap_list) if self.try_brute_force else None,
+                          proposed_swaps = tuple(self.proposed_swaps) if self.investigate_orbits else None,
+                          solving_swap_sequence = self.solving_swap_sequence)
     
     
     def display_final_results(self):
@@ -285,18 +742,17 @@ class CardGame():
         if self.print_val:
             print("-----")
             print("Final results.")
-        # It we managed to find a swap that works, display the swap and the board after swap
-        card1 = [self.original_board_state[swap[0]] for swap in self.solving_swap_list]
-        card2 = [self.original_board_state[swap[1]] for swap in self.solving_swap_list]
-        swap_list_str = []
-        for i in range(len(self.solving_swap_list)):
-            if card1[i] == card2[i]:
-                swap_list_str.append('No swap')
-            else:
-                swap_list_str.append("{} <-> {}".format(card1[i], card2[i]))
-        self.solved = len(swap_list_str) > 0
         # Display results for brute force, if prompted
         if self.print_val and self.try_brute_force:
+            # It we managed to find a swap that works, display the swap and the board after swap
+            card1 = [self.card_labels[self.original_permutation[swap[0] - 1]] for swap in self.solving_swap_list]
+            card2 = [self.card_labels[self.original_permutation[swap[1] - 1]] for swap in self.solving_swap_list]
+            swap_list_str = []
+            for i in range(len(self.solving_swap_list)):
+                if card1[i] == card2[i]:
+                    swap_list_str.append('No swap')
+                else:
+                    swap_list_str.append("{} <-> {}".format(card1[i], card2[i]))
             if len(swap_list_str) > 0:
                 print("-")
                 print("The possible swaps (obtained via brute force) are:\n{}.".format(swap_list_str))
@@ -304,6 +760,14 @@ class CardGame():
             else:
                 print("-")
                 print("No swap seems to work in this configuration, according to brute force...")
+        # Display results for swap sequences, if prompted
+        if self.print_val and self.maximal_swap_number > 1:
+            print("-")
+            if self.solving_swap_sequence is not None:
+                print("A sequence of at most {} swaps that works (as positions) is:\n{}.".format(self.maximal_swap_number, \
+                      list(self.solving_swap_sequence)))
+            else:
+                print("No sequence of at most {} swaps works in this configuration.".format(self.maximal_swap_number))
         # Display results for orbits investigation, if prompted
         if self.print_val and self.investigate_orbits:
             print("-")
@@ -311,15 +775,17 @@ class CardGame():
         # Check if proposed swaps are in the brute force swaps
         if self.print_val and self.investigate_orbits and self.try_brute_force:
             if self.larger_orbit_exists:
-                boolean1, boolean2 = self.check_proposed_swaps_match_with_bf(swap_list_str)
+                boolean1, boolean2 = self.check_proposed_swaps_match_with_bf()
                 print("-")
                 print("The configuration admits an orbit whose length is striclty larger than half of the cards: True.")
                 print("The proposed swaps are contained in the ones proposed by brute force: {}.".format(boolean1))
                 print("The proposed swaps match exactly with the one computed via brute force: {}.".format(boolean2))
             else:
                 print("-")
-                boolean = 'No swap' in swap_list_str and 'No swap' in self.proposed_swaps_list
+                boolean = (1, 1) in self.solving_swap_list and (1, 1) in self.proposed_swaps
                 print("The configuration is already stable and requires no swap: {}.".format(boolean))
+                boolean1, boolean2 = self.check_proposed_swaps_match_with_bf()
+                print("The proposed swaps match exactly with the one computed via brute force: {}.".format(boolean2))
         # Print dictionary (for debugging)
         debugging = False
         if self.print_val and debugging:
@@ -334,51 +800,68 @@ ORBIT CUSTOM CLASS
 
 class Orbit():
 
-    def __init__(self, board_state, sorted_configuration, initial_card):
+    def __init__(self, permutation, card_labels, initial_card, cycle_type_cache = None, maximal_revealed_number = None, \
+                 positions_in_orbit = None):
 
-        # Board state
-        self.board_state = board_state
-        # Sorted board (for reference)
-        self.sorted_configuration = sorted_configuration
+        # Board state (card index at each position, as an array or as a list shared by all orbits of the board)
+        self.permutation = permutation.tolist() if isinstance(permutation, np.ndarray) else permutation
+        # Card labels (for display)
+        self.card_labels = card_labels
         # Number of cards
-        self.number_of_cards = len(self.board_state.keys())
+        self.number_of_cards = len(self.permutation)
+        # Maximal length of an orbit (half of the cards, by default, see get_game_rules)
+        _, self.maximal_revealed_number, _ = get_game_rules(self.number_of_cards, maximal_revealed_number)
+        # Cache of swap patterns per orbit length (shared default cache, if none is given)
+        self.cycle_type_cache = cycle_type_cache if cycle_type_cache is not None else default_cycle_type_cache
         # List of cards in orbit
         self.list_of_cards_in_orbit = []
         # List of positions for cards in orbits
         self.list_of_positions_in_orbit = []
-        # Recreate orbit from card
-        self.recreate_orbit_form_card(initial_card)
+        # Recreate orbit from card, unless its (zero-based) positions are given, in orbit order from the position of the card
+        if positions_in_orbit is None:
+            self.recreate_orbit_form_card(initial_card)
+        else:
+            self.list_of_positions_in_orbit = [position + 1 for position in positions_in_orbit]
+            self.list_of_cards_in_orbit = [self.card_labels[self.permutation[position]] for position in positions_in_orbit]
         # Length of orbit
         self.orbit_length = self.length_of_orbit()
         # Find swaps
         #self.find_swaps()
-        # Find swaps
-        self.possible_swaps = self.compute_all_swaps_for_orbit()
+        # Find swaps (as pairs of one-based positions, the strings being built on demand for display)
+        self.possible_swap_positions = self.compute_all_swap_positions_for_orbit()
 
 
     def recreate_orbit_form_card(self, initial_card):
         
-        # Find initial card in board_state
-        current_position = list(self.sorted_configuration.keys())[list(self.sorted_configuration.values()).index(initial_card)]
-        current_card = self.board_state[current_position]
-        self.list_of_cards_in_orbit.append(current_card)
-        self.list_of_positions_in_orbit.append(current_position)
-        # Recreate orbit iteratively
-        while True:
+        # Find initial card in board_state (its sorted position is its card index)
+        current_position = initial_card
+        current_card = self.permutation[current_position]
+        self.list_of_cards_in_orbit.append(self.card_labels[current_card])
+        self.list_of_positions_in_orbit.append(current_position + 1)
+        # Recreate orbit iteratively, until the orbit is finished
+        while current_card != initial_card:
             # Retrieve next_ card
-            current_position = list(self.sorted_configuration.keys())[list(self.sorted_configuration.values()).index(current_card)]
-            current_card = self.board_state[current_position]
+            current_position = current_card
+            current_card = self.permutation[current_position]
             # Append to lists
-            if not current_card in self.list_of_cards_in_orbit:
-                self.list_of_cards_in_orbit.append(current_card)
-                self.list_of_positions_in_orbit.append(current_position)
-            # Check if orbit is finished
-            if current_card == initial_card:
-                break
+            self.list_of_cards_in_orbit.append(self.card_labels[current_card])
+            self.list_of_positions_in_orbit.append(current_position + 1)
             
 
+    @cached_property
+    def possible_swaps(self):
+        
+        # Swaps as strings (built on demand, for display purposes)
+        return self.compute_all_swaps_for_orbit()
+    
+    
     def is_card_in_orbit(self, card):
-        return card in self.list_of_cards_in_orbit
+        return card in self.set_of_cards_in_orbit
+    
+    
+    @cached_property
+    def set_of_cards_in_orbit(self):
+        return set(self.list_of_cards_in_orbit)
     
     
     def is_swap_in_list(self, swap):
@@ -432,91 +915,1287 @@ class Orbit():
             '''
             
             
+    def compute_all_swap_positions_for_orbit(self):
+        
+        # Same swaps as compute_all_swaps_for_orbit, as sorted pairs of one-based positions ((1, 1) meaning no swap).
+        # The card at index idx in the orbit lies at the position with index idx in the orbit.
+        swap_pattern = self.cycle_type_cache.get_orbit_swap_pattern(self.orbit_length, self.maximal_revealed_number)
+        swap_positions = []
+        for swap in swap_pattern:
+            if swap is None:
+                swap_positions.append((1, 1))
+            else:
+                positions = (self.list_of_positions_in_orbit[swap[0]], self.list_of_positions_in_orbit[swap[1]])
+                swap_positions.append((min(positions), max(positions)))
+        return swap_positions
+    
+    
+    def compute_merge_swap_positions(self, other_orbit):
+        
+        # Swaps merging this orbit with another one, as sorted pairs of one-based positions
+        return [(min(position1, position2), max(position1, position2)) for position1 in self.list_of_positions_in_orbit \
+                for position2 in other_orbit.list_of_positions_in_orbit]
+    
+    
+    def compute_merge_swaps(self, other_orbit):
+        
+        # Swaps merging this orbit with another one, as strings (for display purposes)
+        return [str(card1) + " <-> " + str(card2) for card1 in self.list_of_cards_in_orbit for card2 in other_orbit.list_of_cards_in_orbit]
+    
+    
     def compute_all_swaps_for_orbit(self):
         
-        # Assert size of orbit is smaller than 2*max_size
-        max_size = int(len(list(self.board_state.keys()))/2)
-        err_str = "Impossible to split the given orbit into two orbits of length smaller than max_size."
-        assert self.orbit_length <= 2*max_size, err_str
-        # If orbit longer than 1, or lower than max_size, all swaps work
-        if self.orbit_length == 1:
-            # Return
-            return ["No swap"]
-        if max_size >= self.orbit_length:
-            swap_list = ["No swap"]
-            for idx1 in range(self.orbit_length - 1):
-                for idx2 in range(idx1 + 1, self.orbit_length):
-                    i1 = list(self.list_of_cards_in_orbit)[idx1]
-                    i2 = list(self.list_of_cards_in_orbit)[idx2]
-                    swap_tuple = (i1, i2)
-                    swap_str = str(swap_tuple[0]) + " <-> " + str(swap_tuple[1])
-                    swap_list.append(swap_str)
-            # Return
-            return swap_list
-        # Compute swap list (larger orbit)
+        # Orbits longer than 2*max_size cannot be split into two orbits no longer than max_size, and get no swap
+        max_size = self.maximal_revealed_number
+        # If orbit longer than 1, or lower than max_size, all swaps work, otherwise swaps should split the orbit
+        # in two orbits no longer than max_size. The swaps only depend on the orbit length (see compute_orbit_swap_pattern).
+        swap_pattern = self.cycle_type_cache.get_orbit_swap_pattern(self.orbit_length, max_size)
         swap_list = []
-        for idx1 in range(self.orbit_length):
-            min_val = idx1 + self.orbit_length - max_size
-            max_val = idx1 + max_size + 1
-            idx2_list = [i % self.orbit_length for i in range(min_val, max_val)]
-            for idx2 in idx2_list:
-                i1 = list(self.list_of_cards_in_orbit)[idx1]
-                i2 = list(self.list_of_cards_in_orbit)[idx2]
-                swap_tuple = (i1, i2)
-                swap_str = str(swap_tuple[0]) + " <-> " + str(swap_tuple[1])
-                swap_str_rev = str(swap_tuple[1]) + " <-> " + str(swap_tuple[0]) 
-                if not swap_str in swap_list and not swap_str_rev in swap_list:
-                    swap_list.append(swap_str)
+        for swap in swap_pattern:
+            if swap is None:
+                swap_list.append("No swap")
+            else:
+                swap_list.append(str(self.list_of_cards_in_orbit[swap[0]]) + " <-> " + str(self.list_of_cards_in_orbit[swap[1]]))
         # Return
         return swap_list
             
 
+'''
+LRU_CACHE CUSTOM CLASS
+'''
+
+class LRUCache():
+    
+    def __init__(self, max_size = 4096):
+        
+        # Maximal number of entries (least recently used ones are evicted first)
+        self.max_size = max_size
+        # Entries, from least to most recently used
+        self.entries = OrderedDict()
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        
+        
+    def get(self, key):
+        
+        # Return the cached value (None on a miss), marking it as most recently used
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        return None
+    
+    
+    def put(self, key, value):
+        
+        # Store the value, evicting the least recently used entries if needed
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last = False)
+            
+            
+'''
+CYCLE_TYPE_CACHE CUSTOM CLASS
+'''
+
+class CycleTypeCache(LRUCache):
+    
+    def __init__(self, max_size = 4096, cache_path = None):
+        
+        # Least recently used entries are evicted first
+        super().__init__(max_size = max_size)
+        # File used to persist the cache (if any)
+        self.cache_path = cache_path
+        # Load persisted entries
+        if self.cache_path is not None and os.path.exists(self.cache_path):
+            self.load()
+            
+            
+    def get_statistics(self, number_of_cards, maximal_revealed_number, cycle_lengths, compute_statistics = None):
+        
+        # Return the swap-count statistics of the cycle type. On a miss, compute them with compute_statistics
+        # (analytically if None is given) and store them, unless compute_statistics returns None.
+        key = (number_of_cards, maximal_revealed_number, get_cycle_type(cycle_lengths))
+        statistics = self.get(key)
+        if statistics is None:
+            if compute_statistics is None:
+                statistics = compute_cycle_type_statistics(cycle_lengths, maximal_revealed_number)
+            else:
+                statistics = compute_statistics()
+            if statistics is not None:
+                self.put(key, statistics)
+        return statistics
+    
+    
+    def get_orbit_swap_pattern(self, orbit_length, max_size):
+        
+        # Return the swap pattern of an orbit (a single cycle), computing and storing it on a miss
+        key = ('orbit', orbit_length, max_size)
+        swap_pattern = self.get(key)
+        if swap_pattern is None:
+            swap_pattern = compute_orbit_swap_pattern(orbit_length, max_size)
+            self.put(key, swap_pattern)
+        return swap_pattern
+    
+    
+    def save(self):
+        
+        # Atomically persist the entries as JSON, as [key, value] pairs (if a cache file is requested), like checkpoint files
+        if self.cache_path is None:
+            return
+        save_checkpoint_file(self.cache_path, [[key, value] for key, value in self.entries.items()])
+        
+        
+    def load(self):
+        
+        # Restore persisted entries (keeping the most recently used ones, if they exceed max_size).
+        # JSON turns tuples into lists: keys and orbit swaps are turned back into tuples.
+        for key, value in load_checkpoint_file(self.cache_path):
+            key = convert_lists_to_tuples(key)
+            if key[0] == 'orbit':
+                value = [None if swap is None else tuple(swap) for swap in value]
+            self.put(key, value)
+
+
+def convert_lists_to_tuples(value):
+    
+    # Recursively convert (JSON) lists to tuples
+    return tuple([convert_lists_to_tuples(item) for item in value]) if isinstance(value, list) else value
+
+
+# Cache shared by default by all games and checkers of the process
+default_cycle_type_cache = CycleTypeCache()
+
+
+'''
+NEIGHBOUR_EVALUATOR CUSTOM CLASS
+'''
+
+class NeighbourEvaluator():
+    
+    def __init__(self, permutation):
+        
+        # Single cycle decomposition of the board (O(n)): every swap then either splits one cycle or merges two,
+        # so that its outcome follows from the cycle ids, indices along cycles and lengths, without copying the board
+        self.number_of_cards = len(permutation)
+        cycle_ids, cycle_indices, self.cycle_lengths = get_cycle_decomposition(permutation)
+        self.cycle_ids = np.array(cycle_ids, dtype = np.int64)
+        self.cycle_indices = np.array(cycle_indices, dtype = np.int64)
+        # Three longest cycles, padded with empty ones, to retrieve the longest cycle left untouched by any swap
+        self.longest_cycles = sorted(range(len(self.cycle_lengths)), key = lambda cycle_id: -self.cycle_lengths[cycle_id])[:3]
+        self.longest_cycles += [-1]*(3 - len(self.longest_cycles))
+        self.longest_cycle = self.cycle_lengths[self.longest_cycles[0]]
+        
+        
+    def get_max_untouched_length(self, cycle_id1, cycle_id2):
+        
+        # Longest cycle other than the given ones (0 if none)
+        for cycle_id in self.longest_cycles:
+            if cycle_id >= 0 and cycle_id != cycle_id1 and cycle_id != cycle_id2:
+                return self.cycle_lengths[cycle_id]
+        return 0
+    
+    
+    def get_longest_cycle_after_swap(self, i, j):
+        
+        # Longest cycle after swapping the cards at zero-based positions i and j, in O(1)
+        cycle_id1 = self.cycle_ids[i]
+        cycle_id2 = self.cycle_ids[j]
+        if cycle_id1 == cycle_id2:
+            cycle_length = self.cycle_lengths[cycle_id1]
+            distance = (self.cycle_indices[j] - self.cycle_indices[i]) % cycle_length
+            new_length = max(distance, cycle_length - distance)
+        else:
+            new_length = self.cycle_lengths[cycle_id1] + self.cycle_lengths[cycle_id2]
+        return int(max(new_length, self.get_max_untouched_length(cycle_id1, cycle_id2)))
+    
+    
+    @cached_property
+    def longest_cycle_matrix(self):
+        
+        # Longest cycle after each swap, as a (number_of_cards, number_of_cards) matrix indexed by zero-based positions
+        # (symmetric, the diagonal holding the longest cycle without swap), computed with one vectorized pass
+        cycle_lengths = np.array(self.cycle_lengths + [0], dtype = np.int64)
+        cycle_ids1 = self.cycle_ids[:, None]
+        cycle_ids2 = self.cycle_ids[None, :]
+        lengths1 = cycle_lengths[cycle_ids1]
+        # Split lengths (same cycle) or merged length (different cycles)
+        distances = (self.cycle_indices[None, :] - self.cycle_indices[:, None]) % lengths1
+        new_lengths = np.where(cycle_ids1 == cycle_ids2, np.maximum(distances, lengths1 - distances), \
+                               lengths1 + cycle_lengths[cycle_ids2])
+        # Longest cycle untouched by the swap: the longest of the three longest cycles not involved in it
+        untouched_lengths = np.zeros_like(new_lengths)
+        is_found = np.zeros(new_lengths.shape, dtype = bool)
+        for cycle_id in self.longest_cycles:
+            is_untouched = ~is_found & (cycle_ids1 != cycle_id) & (cycle_ids2 != cycle_id)
+            untouched_lengths[is_untouched] = cycle_lengths[cycle_id]
+            is_found |= is_untouched
+        return np.maximum(new_lengths, untouched_lengths)
+    
+    
+    def get_solving_swaps_array(self, maximal_revealed_number):
+        
+        # Swaps (one-based positions, in brute force order, (1, 1) meaning no swap) making the board solvable,
+        # as a (number of swaps, 2) array
+        rows, columns = get_swap_positions(self.number_of_cards)
+        is_solving = self.longest_cycle_matrix[rows, columns] <= maximal_revealed_number
+        solving_swaps = np.stack([rows[is_solving] + 1, columns[is_solving] + 1], axis = 1).astype(np.int64)
+        if self.longest_cycle <= maximal_revealed_number:
+            solving_swaps = np.concatenate([np.ones((1, 2), dtype = np.int64), solving_swaps])
+        return solving_swaps
+    
+    
+    def get_solving_swaps(self, maximal_revealed_number):
+        
+        # Same swaps, as a list of position pairs
+        return [tuple(swap) for swap in self.get_solving_swaps_array(maximal_revealed_number).tolist()]
+
+
+'''
+CYCLE_STRUCTURE_TRACKER CUSTOM CLASS
+'''
+
+class CycleStructureTracker():
+    
+    def __init__(self, permutation, maximal_revealed_number):
+        
+        # Board (card index at each position), length of the cycle of each position and number of cycles of each length
+        self.permutation = permutation.tolist() if isinstance(permutation, np.ndarray) else list(permutation)
+        self.maximal_revealed_number = maximal_revealed_number
+        cycle_ids, _, cycle_lengths = get_cycle_decomposition(self.permutation)
+        self.position_cycle_lengths = [cycle_lengths[cycle_id] for cycle_id in cycle_ids]
+        self.cycle_length_counts = [0]*(len(self.permutation) + 1)
+        self.longest_cycle = 0
+        # Minimal number of swaps needed to bring every cycle down to maximal_revealed_number
+        self.minimal_swap_number = 0
+        for cycle_length in cycle_lengths:
+            self.add_cycle(cycle_length)
+            
+            
+    def add_cycle(self, cycle_length):
+        
+        self.cycle_length_counts[cycle_length] += 1
+        self.longest_cycle = max(self.longest_cycle, cycle_length)
+        self.minimal_swap_number += (cycle_length - 1) // self.maximal_revealed_number
+        
+        
+    def remove_cycle(self, cycle_length):
+        
+        self.cycle_length_counts[cycle_length] -= 1
+        while self.cycle_length_counts[self.longest_cycle] == 0 and self.longest_cycle > 0:
+            self.longest_cycle -= 1
+        self.minimal_swap_number -= (cycle_length - 1) // self.maximal_revealed_number
+        
+        
+    def apply_swap(self, i, j):
+        
+        # Swap the cards at zero-based positions i and j, and update the cycle statistics by walking only
+        # the cycles containing i and j: the swap merges their two cycles, or splits their common cycle
+        if i == j:
+            return
+        permutation = self.permutation
+        position_cycle_lengths = self.position_cycle_lengths
+        old_length_i = position_cycle_lengths[i]
+        old_length_j = position_cycle_lengths[j]
+        permutation[i], permutation[j] = permutation[j], permutation[i]
+        # Walk the new cycle of i
+        cycle_positions = [i]
+        is_merged = False
+        current_position = permutation[i]
+        while current_position != i:
+            is_merged = is_merged or current_position == j
+            cycle_positions.append(current_position)
+            current_position = permutation[current_position]
+        new_length_i = len(cycle_positions)
+        for position in cycle_positions:
+            position_cycle_lengths[position] = new_length_i
+        if is_merged:
+            self.remove_cycle(old_length_i)
+            self.remove_cycle(old_length_j)
+            self.add_cycle(new_length_i)
+        else:
+            # The rest of the old cycle forms the new cycle of j
+            new_length_j = old_length_i - new_length_i
+            current_position = j
+            for _ in range(new_length_j):
+                position_cycle_lengths[current_position] = new_length_j
+                current_position = permutation[current_position]
+            self.remove_cycle(old_length_i)
+            self.add_cycle(new_length_i)
+            self.add_cycle(new_length_j)
+            
+            
+'''
+INSTRUMENTATION CUSTOM CLASS
+'''
+
+class Instrumentation():
+    
+    def __init__(self, enabled = False):
+        
+        # Disabled by default: stages then run directly, and inner counters are skipped after a single boolean check
+        self.enabled = enabled
+        self.reset()
+        
+        
+    def reset(self):
+        
+        # Wall time (in seconds) and number of calls per stage, and counts of inner operations
+        self.stage_times = Counter()
+        self.stage_calls = Counter()
+        self.counters = Counter()
+        
+        
+    def enable(self):
+        
+        self.enabled = True
+        
+        
+    def disable(self):
+        
+        self.enabled = False
+        
+        
+    def run_stage(self, stage_name, stage_function):
+        
+        # Run a stage, recording its wall time and number of calls when enabled
+        if not self.enabled:
+            return stage_function()
+        start_time = time.perf_counter()
+        try:
+            return stage_function()
+        finally:
+            self.stage_times[stage_name] += time.perf_counter() - start_time
+            self.stage_calls[stage_name] += 1
+            
+            
+    def count(self, counter_name, increment = 1):
+        
+        # Callers check self.enabled first, so that disabled counters cost a single attribute lookup
+        self.counters[counter_name] += increment
+        
+        
+    def get_report(self):
+        
+        # Recorded values, as a JSON serializable dictionary
+        return {"stages": {stage_name: {"calls": self.stage_calls[stage_name],
+                                        "total_time": self.stage_times[stage_name],
+                                        "mean_time": self.stage_times[stage_name]/self.stage_calls[stage_name]} \
+                           for stage_name in self.stage_calls},
+                "counters": dict(self.counters)}
+    
+    
+    def display_report(self):
+        
+        # Display stages (slowest first) and counters
+        print("-----")
+        print("Instrumentation report.")
+        for stage_name, total_time in self.stage_times.most_common():
+            print("{:<25} calls: {:>10} | total: {:10.4f} s | mean: {:10.2f} us".format(stage_name, self.stage_calls[stage_name], \
+                  total_time, 1e6*total_time/self.stage_calls[stage_name]))
+        for counter_name, count in sorted(self.counters.items()):
+            print("{:<25} count: {:>10}".format(counter_name, count))
+            
+            
+    def save(self, report_path):
+        
+        # Dump the report to a JSON file (e.g. after a sweep)
+        with open(report_path, 'w') as report_file:
+            json.dump(self.get_report(), report_file, indent = 2)
+            
+            
+# Registry used by the card games and cycle functions (worker processes of parallel checks keep their own registry)
+default_instrumentation = Instrumentation()
+
+
 '''
 BRUTEFORCE_CHECKER CUSTOM CLASS
 '''
 
 class BruteForceChecker():
     
-    def __init__(self, number_of_cards, print_val = False):
+    def __init__(self, number_of_cards, print_val = False, number_of_workers = 1, chunk_size = None, \
+                 checkpoint_path = None, checkpoint_interval = 60, resume = False, use_cycle_type_cache = True, cycle_type_cache = None, \
+                 maximal_revealed_number = None, maximal_swap_number = 1, sweep_order = 'seed'):
         
-        # Check that the number of cards is valid
-        valid_numbers_of_cards = [4, 8, 16, 32]
-        assert number_of_cards in valid_numbers_of_cards, "The number of cards should be 4, 8, 16 or 32."
-        # Define number of cards
-        self.number_of_cards = number_of_cards
+        # Define number of cards, maximal number of cards to be revealed and maximal number of swaps (see get_game_rules)
+        self.number_of_cards, self.maximal_revealed_number, self.maximal_swap_number = \
+            get_game_rules(number_of_cards, maximal_revealed_number, maximal_swap_number)
+        # Boards are checked in seed order, or in Heap's order (consecutive boards then differ by a single swap,
+        # so that cycle statistics are updated incrementally; serial checks without checkpoints only)
+        assert sweep_order in ['seed', 'heap'], "The sweep order should be 'seed' or 'heap'."
+        error_str = "Heap's order sweeps are serial and cannot be checkpointed."
+        assert sweep_order == 'seed' or (number_of_workers == 1 and checkpoint_path is None), error_str
+        self.sweep_order = sweep_order
         # Define maximal number of mixes
-        self.max_number_mixes = np.math.factorial(number_of_cards)
+        self.max_number_mixes = math.factorial(number_of_cards)
         # Define boolean checker
         self.boolean_checker = True
+        # Define first failing seed (if any), number of checked configurations and number of solvable ones
+        self.first_counterexample_seed = None
+        self.number_checked = 0
+        self.number_solvable = 0
         # Print values?
         self.print_val = print_val
-        # Check all combinations
-        self.check_all_mixes()
+        # Number of worker processes (1 means serial check) and number of seeds per shard (derived from the number of workers if None)
+        self.number_of_workers = number_of_workers
+        self.chunk_size = chunk_size
+        # In serial checks, brute force each cycle type only once, and reuse its result for all boards of the same type
+        self.use_cycle_type_cache = use_cycle_type_cache
+        self.cycle_type_cache = cycle_type_cache if cycle_type_cache is not None else default_cycle_type_cache
+        # Checkpoint file (if any), minimal number of seconds between two checkpoints and ranges of seeds already checked
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.completed_ranges = []
+        self.last_checkpoint_time = time.monotonic()
+        if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
+            self.load_checkpoint()
+        # Check all combinations (skipping the ranges already done)
+        if self.first_counterexample_seed is not None:
+            self.boolean_checker = False
+            print("Mixed configuration {} does not admit a swap that works (from checkpoint)...".format(self.first_counterexample_seed))
+        elif self.number_of_workers > 1:
+            self.check_all_mixes_in_parallel()
+        elif self.sweep_order == 'heap':
+            self.check_all_mixes_in_heap_order()
+        else:
+            self.check_all_mixes()
+        # Final checkpoint
+        self.save_checkpoint()
+        if self.use_cycle_type_cache:
+            self.cycle_type_cache.save()
         # Final display
         if self.boolean_checker:
             print("All configurations seem to work: our strategy is valid for {} cards!".format(number_of_cards))
+        else:
+            print("Our strategy fails for {} cards, revealing at most {} cards after at most {} swaps.".format(number_of_cards, \
+                  self.maximal_revealed_number, self.maximal_swap_number))
         
         
     def check_all_mixes(self):
         
-        for fixed_seed in tqdm(range(1, self.max_number_mixes + 1)):
-            # Display (for tracking)
-            if self.print_val:
-                print("Checking mixed configuration {} / {}".format(fixed_seed, self.max_number_mixes))
-            my_game = CardGame(number_of_cards = self.number_of_cards, fixed_seed = fixed_seed, print_val = False)
-            self.boolean_checker = my_game.solved
-            # If failed, display
-            if not self.boolean_checker:
-                print("Mixed configuration {} does not admit a swap that works...".format(fixed_seed))
-                max_swaps = int(self.number_of_cards*(self.number_of_cards - 1)/2 + 1)
-                print("Tried {} swaps out of {} possible ones.".format(my_game.counter_swaps, max_swaps))
-                print("Displaying failing configuration below.")
-                title_str = 'A counter-example of a failing mix of cards'
-                my_game.display_cards(board = my_game.board_state, title_str = title_str)
-                print(my_game.solving_swap_list)
-                break
-            else:
+        # Import progress bar lazily
+        from tqdm import tqdm
+        missing_ranges = get_missing_seed_ranges(self.completed_ranges, 1, self.max_number_mixes)
+        progress_bar = tqdm(total = sum([last_seed - first_seed + 1 for first_seed, last_seed in missing_ranges]))
+        for first_seed, last_seed in missing_ranges:
+            # Decode consecutive seeds incrementally, rather than each seed from scratch
+            permutations = iterate_permutations(range(self.number_of_cards), first_seed, last_seed - first_seed + 1)
+            for fixed_seed, permutation in zip(range(first_seed, last_seed + 1), permutations):
+                progress_bar.update(1)
+                # Display (for tracking)
                 if self.print_val:
-                    print("Works!")
+                    print("Checking mixed configuration {} / {}".format(fixed_seed, self.max_number_mixes))
+                self.boolean_checker = self.check_mix(fixed_seed, permutation)
+                self.number_checked += 1
+                # If failed, display
+                if not self.boolean_checker:
+                    self.first_counterexample_seed = fixed_seed
+                    self.completed_ranges = merge_seed_ranges(self.completed_ranges + [[first_seed, fixed_seed]])
+                    my_game = self.create_game(fixed_seed)
+                    self.display_counterexample(my_game)
+                    progress_bar.close()
+                    return
+                else:
+                    self.number_solvable += 1
+                    if self.print_val:
+                        print("Works!")
+                # Save progress periodically
+                if self.is_checkpoint_due():
+                    self.completed_ranges = merge_seed_ranges(self.completed_ranges + [[first_seed, fixed_seed]])
+                    self.save_checkpoint()
+            self.completed_ranges = merge_seed_ranges(self.completed_ranges + [[first_seed, last_seed]])
+        progress_bar.close()
+                    
                     
-                    
\ No newline at end of file
+    def check_all_mixes_in_heap_order(self):
+        
+        # Import progress bar lazily
+        from tqdm import tqdm
+        # Start from the sorted board, and go through all boards by single swaps. Failing boards do not stop the sweep,
+        # so that the smallest failing seed (and the aggregates of the seed-order sweep, which stops there) can be reported
+        my_tracker = CycleStructureTracker(range(self.number_of_cards), self.maximal_revealed_number)
+        progress_bar = tqdm(total = self.max_number_mixes)
+        transpositions = iterate_heap_transpositions(self.number_of_cards)
+        progress_step = 2**14
+        number_swept = 0
+        while True:
+            number_swept += 1
+            if number_swept % progress_step == 0:
+                progress_bar.update(progress_step)
+            if my_tracker.minimal_swap_number > self.maximal_swap_number:
+                failing_seed = get_seed_from_permutation(my_tracker.permutation)
+                if self.first_counterexample_seed is None or failing_seed < self.first_counterexample_seed:
+                    self.first_counterexample_seed = failing_seed
+            next_transposition = next(transpositions, None)
+            if next_transposition is None:
+                break
+            my_tracker.apply_swap(*next_transposition)
+        progress_bar.update(number_swept % progress_step)
+        progress_bar.close()
+        # Same aggregates as the seed-order sweep
+        if self.first_counterexample_seed is None:
+            self.number_checked = self.number_solvable = self.max_number_mixes
+            self.completed_ranges = [[1, self.max_number_mixes]]
+        else:
+            self.boolean_checker = False
+            self.number_checked = self.first_counterexample_seed
+            self.number_solvable = self.first_counterexample_seed - 1
+            self.completed_ranges = [[1, self.first_counterexample_seed]]
+            my_game = self.create_game(self.first_counterexample_seed)
+            self.display_counterexample(my_game)
+        
+        
+    def check_mix(self, fixed_seed, permutation = None):
+        
+        # Look for the cycle type of the board (decoded from the seed, if not given) in the cache first,
+        # and run the brute force search on a miss only
+        if self.use_cycle_type_cache:
+            if permutation is None:
+                permutation = get_permutation_array(self.number_of_cards, fixed_seed)
+            _, _, cycle_lengths = get_cycle_decomposition(permutation)
+            cycle_type_statistics = self.cycle_type_cache.get_statistics(self.number_of_cards, self.maximal_revealed_number, \
+                                                                         cycle_lengths, lambda: None)
+            if cycle_type_statistics is not None:
+                return cycle_type_statistics["minimal_swap_number"] <= self.maximal_swap_number
+        my_game = self.create_game(fixed_seed)
+        if self.use_cycle_type_cache:
+            # Store the brute force statistics of the cycle type, for the next boards of the same type
+            my_game.classify_cycle_type()
+        return my_game.solved
+    
+    
+    def create_game(self, fixed_seed):
+        
+        # Create the (silent and lazy) game for a given seed, with the rules of the checker
+        return CardGame(number_of_cards = self.number_of_cards, fixed_seed = fixed_seed, print_val = False, cycle_type_cache = self.cycle_type_cache, \
+                        maximal_revealed_number = self.maximal_revealed_number, maximal_swap_number = self.maximal_swap_number, lazy = True)
+                    
+                    
+    def check_all_mixes_in_parallel(self):
+        
+        # Import progress bar and process pool lazily
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+        import multiprocessing
+        from tqdm import tqdm
+        # The shared stop seed must fit in a machine integer
+        error_str = "Parallel checks are limited to {} seeds.".format(np.iinfo(np.int64).max - 1)
+        assert self.max_number_mixes < np.iinfo(np.int64).max, error_str
+        # Shared smallest failing seed found so far (max_number_mixes + 1 if none), used to stop the shards located after it
+        stop_seed = multiprocessing.Value('q', self.max_number_mixes + 1)
+        # Contiguous shards of the seeds left to check
+        missing_ranges = get_missing_seed_ranges(self.completed_ranges, 1, self.max_number_mixes)
+        # By default, about four shards per worker (of at most 10**6 seeds), so that all workers stay busy
+        chunk_size = self.chunk_size
+        if chunk_size is None:
+            number_of_missing_seeds = sum([last_seed - first_seed + 1 for first_seed, last_seed in missing_ranges])
+            chunk_size = min(max(number_of_missing_seeds // (4*self.number_of_workers), 1), 10**6)
+        shards = iterate_seed_shards(missing_ranges, chunk_size)
+        number_of_shards = sum([-(-(last_seed - first_seed + 1) // chunk_size) for first_seed, last_seed in missing_ranges])
+        shard_results = []
+        with ProcessPoolExecutor(max_workers = self.number_of_workers, initializer = initialize_shard_worker, \
+                                 initargs = (stop_seed,)) as executor, tqdm(total = number_of_shards) as progress_bar:
+            # Keep a bounded number of shards in flight, submitted in seed order
+            running_shards = set()
+            next_shard = next(shards, None)
+            while running_shards or next_shard is not None:
+                while next_shard is not None and len(running_shards) < 2*self.number_of_workers:
+                    # Do not submit shards located after a known counterexample
+                    if next_shard[0] > stop_seed.value:
+                        next_shard = None
+                        break
+                    running_shards.add(executor.submit(check_seed_shard, self.number_of_cards, next_shard[0], next_shard[1], \
+                                                       self.maximal_revealed_number, self.maximal_swap_number))
+                    next_shard = next(shards, None)
+                done_shards, running_shards = wait(running_shards, return_when = FIRST_COMPLETED)
+                for shard in done_shards:
+                    shard_result = shard.result()
+                    shard_results.append(shard_result)
+                    progress_bar.update(1)
+                    # Record fully checked shards, and save progress periodically
+                    if shard_result[2] is None and shard_result[3] == shard_result[1] - shard_result[0] + 1:
+                        self.completed_ranges = merge_seed_ranges(self.completed_ranges + [[shard_result[0], shard_result[1]]])
+                        self.number_checked += shard_result[3]
+                        self.number_solvable += shard_result[4]
+                        if self.is_checkpoint_due():
+                            self.save_checkpoint()
+        # Merge shard results, independently of their completion order
+        self.merge_shard_results(shard_results)
+        # If failed, display
+        if not self.boolean_checker:
+            my_game = self.create_game(self.first_counterexample_seed)
+            self.display_counterexample(my_game)
+            
+            
+    def merge_shard_results(self, shard_results):
+        
+        # Each shard result is (first seed, last seed, first failing seed or None, number checked, number solvable),
+        # fully checked shards being already accounted for in the aggregates
+        counterexample_seeds = [result[2] for result in shard_results if result[2] is not None]
+        if counterexample_seeds:
+            # All shards before the first counterexample were fully checked, and are solvable
+            self.boolean_checker = False
+            self.first_counterexample_seed = min(counterexample_seeds)
+            self.number_checked = self.first_counterexample_seed
+            self.number_solvable = self.first_counterexample_seed - 1
+            self.completed_ranges = merge_seed_ranges([[1, self.first_counterexample_seed]])
+        else:
+            self.boolean_checker = True
+            
+            
+    def is_checkpoint_due(self):
+        
+        # Check if a checkpoint file is requested and if the last checkpoint is old enough
+        if self.checkpoint_path is None:
+            return False
+        return time.monotonic() - self.last_checkpoint_time >= self.checkpoint_interval
+    
+    
+    def save_checkpoint(self):
+        
+        # Atomically write completed seed ranges and partial aggregates (if a checkpoint file is requested)
+        if self.checkpoint_path is None:
+            return
+        checkpoint = {"number_of_cards": self.number_of_cards,
+                      "maximal_revealed_number": self.maximal_revealed_number,
+                      "maximal_swap_number": self.maximal_swap_number,
+                      "completed_ranges": self.completed_ranges,
+                      "number_checked": self.number_checked,
+                      "number_solvable": self.number_solvable,
+                      "first_counterexample_seed": self.first_counterexample_seed}
+        save_checkpoint_file(self.checkpoint_path, checkpoint)
+        self.last_checkpoint_time = time.monotonic()
+        
+        
+    def load_checkpoint(self):
+        
+        # Restore completed seed ranges and partial aggregates from the checkpoint file
+        checkpoint = load_checkpoint_file(self.checkpoint_path)
+        error_str = "The checkpoint file was written for {} cards.".format(checkpoint["number_of_cards"])
+        assert checkpoint["number_of_cards"] == self.number_of_cards, error_str
+        error_str = "The checkpoint file was written for other game rules."
+        assert checkpoint["maximal_revealed_number"] == self.maximal_revealed_number, error_str
+        assert checkpoint["maximal_swap_number"] == self.maximal_swap_number, error_str
+        self.completed_ranges = merge_seed_ranges(checkpoint["completed_ranges"])
+        self.number_checked = checkpoint["number_checked"]
+        self.number_solvable = checkpoint["number_solvable"]
+        self.first_counterexample_seed = checkpoint["first_counterexample_seed"]
+            
+            
+    def display_counterexample(self, my_game):
+        
+        print("Mixed configuration {} does not admit a swap that works...".format(my_game.fixed_seed))
+        max_swaps = int(self.number_of_cards*(self.number_of_cards - 1)/2 + 1)
+        print("Tried {} swaps out of {} possible ones.".format(my_game.counter_swaps, max_swaps))
+        print("Displaying failing configuration below.")
+        title_str = 'A counter-example of a failing mix of cards'
+        my_game.display_cards(board = my_game.board_state, title_str = title_str)
+        print(my_game.solving_swap_list)
+                    
+                    
+'''
+CHECKPOINT FUNCTIONS
+'''
+
+def merge_seed_ranges(seed_ranges):
+    
+    # Sort and merge overlapping or adjacent ranges of seeds (both ends included)
+    merged_ranges = []
+    for first_seed, last_seed in sorted(seed_ranges):
+        if merged_ranges and first_seed <= merged_ranges[-1][1] + 1:
+            merged_ranges[-1][1] = max(merged_ranges[-1][1], last_seed)
+        else:
+            merged_ranges.append([first_seed, last_seed])
+    return merged_ranges
+
+
+def get_missing_seed_ranges(completed_ranges, first_seed, last_seed):
+    
+    # Return the ranges of seeds between first_seed and last_seed (included) not covered by completed_ranges
+    missing_ranges = []
+    next_seed = first_seed
+    for range_start, range_end in merge_seed_ranges(completed_ranges):
+        if range_start > next_seed:
+            missing_ranges.append([next_seed, min(range_start - 1, last_seed)])
+        next_seed = max(next_seed, range_end + 1)
+        if next_seed > last_seed:
+            break
+    if next_seed <= last_seed:
+        missing_ranges.append([next_seed, last_seed])
+    return missing_ranges
+
+
+def iterate_seed_shards(seed_ranges, chunk_size):
+    
+    # Split ranges of seeds in contiguous shards of at most chunk_size seeds
+    for first_seed, last_seed in seed_ranges:
+        for shard_start in range(first_seed, last_seed + 1, chunk_size):
+            yield shard_start, min(shard_start + chunk_size - 1, last_seed)
+
+
+def save_checkpoint_file(checkpoint_path, checkpoint):
+    
+    # Write to a temporary file in the same folder, then replace the checkpoint file in a single atomic step
+    checkpoint_folder = os.path.dirname(os.path.abspath(checkpoint_path))
+    file_descriptor, temporary_path = tempfile.mkstemp(dir = checkpoint_folder, suffix = '.tmp')
+    try:
+        with os.fdopen(file_descriptor, 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary_path, checkpoint_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def load_checkpoint_file(checkpoint_path):
+    
+    with open(checkpoint_path, 'r') as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+'''
+SHARD WORKER FUNCTIONS
+'''
+
+# Shared smallest failing seed, set in each worker process by initialize_shard_worker
+shard_stop_seed = None
+
+# Number of seeds evaluated at once by a shard worker
+shard_batch_size = 2**14
+
+
+def initialize_shard_worker(stop_seed):
+    
+    # Store the shared stop seed in the worker process
+    global shard_stop_seed
+    shard_stop_seed = stop_seed
+
+
+def check_seed_shard(number_of_cards, first_seed, last_seed, maximal_revealed_number = None, maximal_swap_number = 1):
+    
+    # Check all seeds between first_seed and last_seed (included) in vectorized batches, and return
+    # (first seed, last seed, first failing seed or None, number checked, number solvable).
+    # Stop early when a counterexample has been found before the current batch, in any worker.
+    number_checked = 0
+    number_solvable = 0
+    for batch_start in range(first_seed, last_seed + 1, shard_batch_size):
+        if shard_stop_seed is not None and shard_stop_seed.value < batch_start:
+            break
+        batch_end = min(batch_start + shard_batch_size - 1, last_seed)
+        solvable, _, _ = evaluate_seeds(number_of_cards, np.arange(batch_start, batch_end + 1, dtype = np.int64), \
+                                        maximal_revealed_number, maximal_swap_number)
+        failing_indices = np.flatnonzero(~solvable)
+        if failing_indices.size > 0:
+            failing_seed = batch_start + int(failing_indices[0])
+            number_checked += int(failing_indices[0]) + 1
+            number_solvable += int(failing_indices[0])
+            # Share the counterexample with the other workers
+            if shard_stop_seed is not None:
+                with shard_stop_seed.get_lock():
+                    shard_stop_seed.value = min(shard_stop_seed.value, failing_seed)
+            return first_seed, last_seed, failing_seed, number_checked, number_solvable
+        number_checked += len(solvable)
+        number_solvable += int(solvable.sum())
+    return first_seed, last_seed, None, number_checked, number_solvable
+
+
+'''
+PARTITION_COUNTER CUSTOM CLASS
+'''
+
+class PartitionCounter():
+    
+    def __init__(self, number_of_cards, print_val = True, cycle_type_cache = None, maximal_revealed_number = None, maximal_swap_number = 1):
+        
+        # Define number of cards, maximal number of cards to be revealed by prisoner two and maximal number of swaps
+        # to be made by prisoner 1 (see get_game_rules)
+        self.number_of_cards, self.maximal_revealed_number, self.maximal_swap_number = \
+            get_game_rules(number_of_cards, maximal_revealed_number, maximal_swap_number)
+        # Define maximal number of mixes
+        self.max_number_mixes = math.factorial(number_of_cards)
+        # Print values?
+        self.print_val = print_val
+        # Cache of swap-count statistics per cycle type (shared default cache, if none is given)
+        self.cycle_type_cache = cycle_type_cache if cycle_type_cache is not None else default_cycle_type_cache
+        # Count all configurations, one cycle type at a time
+        self.count_all_cycle_types()
+        # Final display
+        if self.print_val:
+            self.display_counts()
+            
+            
+    def count_all_cycle_types(self):
+        
+        # Number of cycle types, number of boards solvable without swap and with (at most) one swap,
+        # and number of boards for each number of valid swaps (including no swap)
+        self.number_of_cycle_types = 0
+        self.solvable_without_swap_count = 0
+        self.solvable_with_one_swap_count = 0
+        self.solvable_with_allowed_swaps_count = 0
+        self.valid_swaps_distribution = {}
+        for cycle_type in iterate_cycle_types(self.number_of_cards):
+            # Each cycle type stands for all the boards sharing it
+            number_of_boards = count_permutations_with_cycle_type(cycle_type)
+            statistics = self.cycle_type_cache.get_statistics(self.number_of_cards, self.maximal_revealed_number, cycle_type)
+            self.number_of_cycle_types += 1
+            self.solvable_without_swap_count += number_of_boards*statistics["solvable_without_swap"]
+            self.solvable_with_one_swap_count += number_of_boards*statistics["solved"]
+            self.solvable_with_allowed_swaps_count += number_of_boards*(statistics["minimal_swap_number"] <= self.maximal_swap_number)
+            valid_swaps_count = statistics["valid_swaps_count"]
+            self.valid_swaps_distribution[valid_swaps_count] = self.valid_swaps_distribution.get(valid_swaps_count, 0) + number_of_boards
+        self.valid_swaps_distribution = dict(sorted(self.valid_swaps_distribution.items()))
+        # Success rate of the strategy
+        self.success_rate = self.solvable_with_allowed_swaps_count/self.max_number_mixes
+        
+        
+    def display_counts(self):
+        
+        print("Counted {} configurations of {} cards, over {} cycle types.".format(self.max_number_mixes, \
+              self.number_of_cards, self.number_of_cycle_types))
+        print("Configurations solvable without swap: {}.".format(self.solvable_without_swap_count))
+        print("Configurations solvable with at most one swap: {}.".format(self.solvable_with_one_swap_count))
+        print("Number of configurations for each number of valid swaps:\n{}.".format(self.valid_swaps_distribution))
+        print("Configurations solvable with at most {} swaps, revealing at most {} cards: {} (success rate: {}).".format( \
+              self.maximal_swap_number, self.maximal_revealed_number, self.solvable_with_allowed_swaps_count, self.success_rate))
+        if self.solvable_with_allowed_swaps_count == self.max_number_mixes:
+            print("All configurations work: our strategy is valid for {} cards!".format(self.number_of_cards))
+            
+            
+    def cross_check_with_brute_force(self):
+        
+        # Compare the counts with the ones obtained by playing every swap of every configuration
+        solvable_without_swap_count = 0
+        solvable_with_one_swap_count = 0
+        valid_swaps_distribution = {}
+        for fixed_seed in range(1, self.max_number_mixes + 1):
+            my_game = CardGame(number_of_cards = self.number_of_cards, fixed_seed = fixed_seed, investigate_orbits = False, \
+                               print_val = False, maximal_revealed_number = self.maximal_revealed_number, lazy = True)
+            brute_force_swaps = my_game.get_solving_swaps_by_simulation()
+            solvable_without_swap_count += (1, 1) in brute_force_swaps
+            solvable_with_one_swap_count += len(brute_force_swaps) > 0
+            valid_swaps_count = len(brute_force_swaps)
+            valid_swaps_distribution[valid_swaps_count] = valid_swaps_distribution.get(valid_swaps_count, 0) + 1
+        return solvable_without_swap_count == self.solvable_without_swap_count \
+               and solvable_with_one_swap_count == self.solvable_with_one_swap_count \
+               and dict(sorted(valid_swaps_distribution.items())) == self.valid_swaps_distribution
+
+
+'''
+BATCH FUNCTIONS
+'''
+
+def get_seeds_array(number_of_cards, seeds):
+    
+    # Use machine integers whenever all seeds fit in them, and Python integers otherwise (e.g. 32 cards)
+    if math.factorial(number_of_cards) <= np.iinfo(np.int64).max:
+        return np.asarray(seeds, dtype = np.int64).reshape(-1)
+    return np.asarray(seeds, dtype = object).reshape(-1)
+
+
+def get_permutations_matrix(number_of_cards, seeds):
+    
+    # Decode a whole array of seeds into a 2-D matrix of permutations (one board per row), with the
+    # same ordering as get_nth_permutation: cards are inserted one by one (last card first),
+    # each at the position given by the next digit of the seed in the factorial number system
+    seeds = get_seeds_array(number_of_cards, seeds)
+    permutations_matrix = np.empty((len(seeds), number_of_cards), dtype = get_permutation_dtype(number_of_cards))
+    permutations_matrix[:, 0] = number_of_cards - 1
+    remaining_seeds = seeds.copy()
+    for divider in range(2, number_of_cards + 1):
+        # Retrieve insertion positions
+        insert_positions = (remaining_seeds % divider).astype(np.intp)[:, None]
+        remaining_seeds = remaining_seeds // divider
+        # Insert card in every row, shifting the cards located after the insertion position
+        current_rows = permutations_matrix[:, :divider - 1]
+        shifted_rows = np.concatenate([current_rows[:, :1], current_rows], axis = 1)
+        unshifted_rows = np.concatenate([current_rows, current_rows[:, :1]], axis = 1)
+        columns = np.arange(divider)[None, :]
+        permutations_matrix[:, :divider] = np.where(columns < insert_positions, unshifted_rows, \
+                                                    np.where(columns == insert_positions, number_of_cards - divider, shifted_rows))
+    return permutations_matrix
+
+
+def get_cycle_lengths_matrix(permutations_matrix):
+    
+    # Return the length of the cycle containing each position, for every row, by following
+    # all cycles simultaneously until every position has come back to itself
+    number_of_rows, number_of_cards = permutations_matrix.shape
+    rows = np.arange(number_of_rows)[:, None]
+    positions = np.arange(number_of_cards)[None, :]
+    current_positions = permutations_matrix.astype(np.intp)
+    cycle_lengths_matrix = np.where(current_positions == positions, 1, 0)
+    for step in range(2, number_of_cards + 1):
+        if cycle_lengths_matrix.all():
+            break
+        current_positions = current_positions[rows, permutations_matrix]
+        cycle_lengths_matrix[(current_positions == positions) & (cycle_lengths_matrix == 0)] = step
+    return cycle_lengths_matrix
+
+
+def count_valid_swaps_matrix(cycle_lengths_matrix, maximal_revealed_number):
+    
+    # Count, for every row, the swaps (including no swap) making the board solvable, from its cycle lengths only.
+    # - If no cycle is longer than maximal_revealed_number, no swap and all swaps within a cycle work,
+    #   as well as the swaps merging two cycles whose total length remains small enough.
+    # - If a single cycle of length L is too long, only the swaps splitting it in two small enough cycles work,
+    #   i.e. L*(2*maximal_revealed_number - L + 1)/2 swaps.
+    # - If several cycles are too long, no single swap works.
+    number_of_rows, number_of_cards = cycle_lengths_matrix.shape
+    m = maximal_revealed_number
+    longest_cycle = cycle_lengths_matrix.max(axis = 1)
+    long_elements = cycle_lengths_matrix > m
+    number_of_long_cycles = np.rint((long_elements/cycle_lengths_matrix).sum(axis = 1)).astype(np.int64)
+    # Number of elements in cycles of each length k, for every row
+    elements_per_length = np.bincount((np.arange(number_of_rows)[:, None]*(number_of_cards + 1) + cycle_lengths_matrix).ravel(), \
+                                      minlength = number_of_rows*(number_of_cards + 1)).reshape(number_of_rows, number_of_cards + 1)
+    elements_per_length = elements_per_length.astype(np.int64)
+    lengths = np.arange(number_of_cards + 1)
+    # Swaps when all cycles are small enough
+    splitting_swaps = ((cycle_lengths_matrix - 1).sum(axis = 1)) // 2
+    merge_mask = ((lengths[:, None] + lengths[None, :]) <= m) & (lengths[:, None] > 0) & (lengths[None, :] > 0)
+    merging_pairs = np.einsum('bk,kl,bl->b', elements_per_length, merge_mask.astype(np.int64), elements_per_length)
+    merging_pairs = merging_pairs - elements_per_length @ (lengths*(2*lengths <= m))
+    all_small_count = 1 + splitting_swaps + merging_pairs // 2
+    # Swaps when a single cycle is too long
+    one_long_count = np.maximum(longest_cycle*(2*m - longest_cycle + 1), 0) // 2
+    return np.where(number_of_long_cycles == 0, all_small_count, np.where(number_of_long_cycles == 1, one_long_count, 0))
+
+
+def get_minimal_swap_number_matrix(cycle_lengths_matrix, maximal_revealed_number):
+    
+    # Minimal number of swaps making each row solvable (see get_minimal_swap_number), each cycle of length L
+    # contributing (ceil(L/m) - 1)/L for each of its L positions
+    minimal_swap_numbers = ((-(-cycle_lengths_matrix // maximal_revealed_number) - 1)/cycle_lengths_matrix).sum(axis = 1)
+    return np.rint(minimal_swap_numbers).astype(np.int64)
+
+
+def evaluate_permutations_matrix(permutations_matrix, maximal_revealed_number, maximal_swap_number = 1):
+    
+    # Return the solvable flags, longest cycle lengths, valid swaps counts and minimal swap numbers
+    # for a matrix of boards (one board per row, e.g. given directly rather than by seeds)
+    cycle_lengths_matrix = get_cycle_lengths_matrix(permutations_matrix)
+    longest_cycle = cycle_lengths_matrix.max(axis = 1) if len(permutations_matrix) > 0 else np.zeros(0, dtype = np.int64)
+    valid_swaps_count = count_valid_swaps_matrix(cycle_lengths_matrix, maximal_revealed_number)
+    minimal_swap_number = get_minimal_swap_number_matrix(cycle_lengths_matrix, maximal_revealed_number)
+    return minimal_swap_number <= maximal_swap_number, longest_cycle, valid_swaps_count, minimal_swap_number
+
+
+def evaluate_seeds(number_of_cards, seeds, maximal_revealed_number = None, maximal_swap_number = 1):
+    
+    # Return the solvable flags, longest cycle lengths and valid swaps counts for an array of seeds
+    my_batch = BatchCardGame(number_of_cards = number_of_cards, seeds = seeds, maximal_revealed_number = maximal_revealed_number, \
+                             maximal_swap_number = maximal_swap_number)
+    return my_batch.solvable, my_batch.longest_cycle, my_batch.valid_swaps_count
+
+
+'''
+BATCH_CARD_GAME CUSTOM CLASS
+'''
+
+class BatchCardGame():
+    
+    def __init__(self, number_of_cards, seeds, maximal_revealed_number = None, maximal_swap_number = 1):
+        
+        # Define number of cards, maximal number of cards to be revealed by prisoner two and maximal number of swaps
+        # to be made by prisoner 1 (see get_game_rules)
+        self.number_of_cards, self.maximal_revealed_number, self.maximal_swap_number = \
+            get_game_rules(number_of_cards, maximal_revealed_number, maximal_swap_number)
+        # Define seeds
+        self.seeds = get_seeds_array(number_of_cards, seeds)
+        max_number_mixes = math.factorial(number_of_cards)
+        error_seed_str = "The seeds should be integers between 1 and {}".format(max_number_mixes)
+        assert len(self.seeds) == 0 or (self.seeds.min() >= 1 and self.seeds.max() <= max_number_mixes), error_seed_str
+        # Decode all boards at once (one board per row)
+        self.permutations_matrix = get_permutations_matrix(number_of_cards, self.seeds)
+        # Compute cycle lengths for all positions of all boards
+        self.cycle_lengths_matrix = get_cycle_lengths_matrix(self.permutations_matrix)
+        # Longest cycle of each board
+        self.longest_cycle = self.cycle_lengths_matrix.max(axis = 1) if len(self.seeds) > 0 else np.zeros(0, dtype = np.int64)
+        # Number of single swaps (including no swap) making each board solvable
+        self.valid_swaps_count = count_valid_swaps_matrix(self.cycle_lengths_matrix, self.maximal_revealed_number)
+        # Minimal number of swaps making each board solvable
+        self.minimal_swap_number = get_minimal_swap_number_matrix(self.cycle_lengths_matrix, self.maximal_revealed_number)
+        # Is each board solvable with at most maximal_swap_number swaps?
+        self.solvable = self.minimal_swap_number <= self.maximal_swap_number
+
+
+'''
+MONTE_CARLO_ESTIMATOR CUSTOM CLASS
+'''
+
+class MonteCarloEstimator():
+    
+    def __init__(self, number_of_cards, maximal_revealed_number = None, maximal_swap_number = 1, batch_size = 10000, \
+                 target_half_width = 1e-3, confidence = 0.95, max_samples = 10**7, random_seed = None, print_val = True):
+        
+        # Define number of cards, maximal number of cards to be revealed by prisoner two and maximal number of swaps
+        # to be made by prisoner 1 (see get_game_rules)
+        self.number_of_cards, self.maximal_revealed_number, self.maximal_swap_number = \
+            get_game_rules(number_of_cards, maximal_revealed_number, maximal_swap_number)
+        # Number of boards drawn at once, and maximal number of boards drawn
+        assert int(batch_size) == batch_size and batch_size >= 1, "The batch size should be a positive integer."
+        assert int(max_samples) == max_samples and max_samples >= 1, "The maximal number of samples should be a positive integer."
+        self.batch_size = int(batch_size)
+        self.max_samples = int(max_samples)
+        # Stop as soon as the confidence intervals of all estimated rates are narrower than +/- target_half_width
+        self.target_half_width = target_half_width
+        self.confidence = confidence
+        # Seeded random generator, drawing uniformly random boards
+        self.random_generator = np.random.default_rng(random_seed)
+        # Print values?
+        self.print_val = print_val
+        # Sample boards until the target precision (or the maximal number of samples) is reached
+        self.sample_all_batches()
+        # Final display
+        if self.print_val:
+            self.display_estimates()
+            
+            
+    def sample_all_batches(self):
+        
+        # Running counts and longest cycle statistics
+        self.number_of_samples = 0
+        self.solvable_count = 0
+        self.solvable_without_swap_count = 0
+        self.longest_cycle_mean = 0.0
+        self.longest_cycle_sum_of_squares = 0.0
+        self.longest_cycle_histogram = np.zeros(self.number_of_cards + 1, dtype = np.int64)
+        self.converged = False
+        sorted_board = np.arange(self.number_of_cards, dtype = get_permutation_dtype(self.number_of_cards))
+        while self.number_of_samples < self.max_samples and not self.converged:
+            # Draw a batch of uniformly random boards (one per row)
+            batch_size = min(self.batch_size, self.max_samples - self.number_of_samples)
+            permutations_matrix = self.random_generator.permuted(np.tile(sorted_board, (batch_size, 1)), axis = 1)
+            cycle_lengths_matrix = get_cycle_lengths_matrix(permutations_matrix)
+            longest_cycle = cycle_lengths_matrix.max(axis = 1)
+            minimal_swap_number = get_minimal_swap_number_matrix(cycle_lengths_matrix, self.maximal_revealed_number)
+            # Update running statistics
+            self.update_statistics(longest_cycle, minimal_swap_number)
+            # Check precision
+            self.compute_estimates()
+            self.converged = max(self.success_rate_interval[1] - self.success_rate_interval[0], \
+                                 self.solvable_without_swap_rate_interval[1] - self.solvable_without_swap_rate_interval[0]) \
+                             <= 2*self.target_half_width
+            
+            
+    def update_statistics(self, longest_cycle, minimal_swap_number):
+        
+        # Merge the batch into the running counts, and the running mean and sum of squares of the longest cycle
+        batch_size = len(longest_cycle)
+        self.solvable_count += int((minimal_swap_number <= self.maximal_swap_number).sum())
+        self.solvable_without_swap_count += int((longest_cycle <= self.maximal_revealed_number).sum())
+        self.longest_cycle_histogram += np.bincount(longest_cycle, minlength = self.number_of_cards + 1)
+        batch_mean = float(longest_cycle.mean())
+        batch_sum_of_squares = float(((longest_cycle - batch_mean)**2).sum())
+        total_samples = self.number_of_samples + batch_size
+        delta = batch_mean - self.longest_cycle_mean
+        self.longest_cycle_mean += delta*batch_size/total_samples
+        self.longest_cycle_sum_of_squares += batch_sum_of_squares + delta**2*self.number_of_samples*batch_size/total_samples
+        self.number_of_samples = total_samples
+        
+        
+    def compute_estimates(self):
+        
+        # Rates, with their Wilson confidence intervals, and longest cycle standard deviation
+        self.success_rate = self.solvable_count/self.number_of_samples
+        self.success_rate_interval = get_wilson_interval(self.solvable_count, self.number_of_samples, self.confidence)
+        self.solvable_without_swap_rate = self.solvable_without_swap_count/self.number_of_samples
+        self.solvable_without_swap_rate_interval = get_wilson_interval(self.solvable_without_swap_count, self.number_of_samples, \
+                                                                       self.confidence)
+        self.longest_cycle_std = math.sqrt(self.longest_cycle_sum_of_squares/max(self.number_of_samples - 1, 1))
+        
+        
+    def display_estimates(self):
+        
+        print("Sampled {} random configurations of {} cards (converged: {}).".format(self.number_of_samples, \
+              self.number_of_cards, self.converged))
+        print("Solvable with at most {} swaps, revealing at most {} cards: {:.6f}, {:.0%} confidence interval [{:.6f}, {:.6f}].".format( \
+              self.maximal_swap_number, self.maximal_revealed_number, self.success_rate, self.confidence, *self.success_rate_interval))
+        print("Solvable without swap: {:.6f}, {:.0%} confidence interval [{:.6f}, {:.6f}].".format(self.solvable_without_swap_rate, \
+              self.confidence, *self.solvable_without_swap_rate_interval))
+        print("Longest cycle: mean {:.4f}, standard deviation {:.4f}.".format(self.longest_cycle_mean, self.longest_cycle_std))
+
+
+def get_wilson_interval(successes, samples, confidence = 0.95):
+    
+    # Wilson score interval for a binomial proportion
+    z = NormalDist().inv_cdf(1 - (1 - confidence)/2)
+    proportion = successes/samples
+    denominator = 1 + z**2/samples
+    center = (proportion + z**2/(2*samples))/denominator
+    half_width = z*math.sqrt(proportion*(1 - proportion)/samples + z**2/(4*samples**2))/denominator
+    return max(center - half_width, 0.0), min(center + half_width, 1.0)
+
+
+'''
+RESULT_RECORD CUSTOM CLASSES
+'''
+
+class GameResult():
+    
+    # Fixed set of attributes, to keep millions of records compact
+    __slots__ = ('number_of_cards', 'fixed_seed', 'maximal_revealed_number', 'maximal_swap_number', 'solved', 'longest_cycle', \
+                 'valid_swaps_count', 'minimal_swap_number', 'solving_swaps', 'proposed_swaps', 'solving_swap_sequence')
+    
+    def __init__(self, number_of_cards, fixed_seed, maximal_revealed_number, maximal_swap_number, solved, longest_cycle, \
+                 valid_swaps_count, minimal_swap_number, solving_swaps = None, proposed_swaps = None, solving_swap_sequence = None):
+        
+        # Game rules and seed
+        self.number_of_cards = number_of_cards
+        self.fixed_seed = fixed_seed
+        self.maximal_revealed_number = maximal_revealed_number
+        self.maximal_swap_number = maximal_swap_number
+        # Verdict and cycle statistics
+        self.solved = solved
+        self.longest_cycle = longest_cycle
+        self.valid_swaps_count = valid_swaps_count
+        self.minimal_swap_number = minimal_swap_number
+        # Swaps as tuples of (one-based) position pairs, (1, 1) meaning no swap (None if not computed)
+        self.solving_swaps = solving_swaps
+        self.proposed_swaps = proposed_swaps
+        self.solving_swap_sequence = solving_swap_sequence
+        
+        
+    def as_dict(self):
+        
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+    
+    
+    def __eq__(self, other):
+        
+        return isinstance(other, GameResult) and self.as_dict() == other.as_dict()
+    
+    
+    def __hash__(self):
+        
+        # Consistent with __eq__ (swaps are stored as tuples)
+        return hash(tuple(self.as_dict().values()))
+    
+    
+    def __repr__(self):
+        
+        return "GameResult({})".format(", ".join(["{} = {!r}".format(key, value) for key, value in self.as_dict().items()]))
+
+
+class ResultExporter():
+    
+    def __init__(self, output_prefix, number_of_cards, chunk_size = 1000000, file_format = 'npy'):
+        
+        # Chunk files are named <output_prefix>_<chunk number>.npy (or .parquet)
+        self.output_prefix = output_prefix
+        self.number_of_cards = number_of_cards
+        # Number of rows per chunk file
+        self.chunk_size = chunk_size
+        # File format: 'npy' (NumPy structured arrays) or 'parquet' (requires pyarrow)
+        assert file_format in ['npy', 'parquet'], "The file format should be 'npy' or 'parquet'."
+        self.file_format = file_format
+        # Seeds are stored as integers when they fit in 64 bits, and as boards (card index at each position) otherwise
+        self.store_seeds = math.factorial(number_of_cards) <= np.iinfo(np.int64).max
+        identifier_field = ('seed', np.int64) if self.store_seeds else ('board', get_permutation_dtype(number_of_cards), (number_of_cards,))
+        self.record_dtype = np.dtype([identifier_field, ('solvable', np.bool_), ('longest_cycle', np.int16), \
+                                      ('valid_swaps_count', np.int32), ('minimal_swap_number', np.int16)])
+        # Buffered rows, and list of written files
+        self.buffered_records = []
+        self.number_of_buffered_records = 0
+        self.number_of_chunks = 0
+        self.written_paths = []
+        
+        
+    def __enter__(self):
+        
+        return self
+    
+    
+    def __exit__(self, exception_type, exception_value, traceback):
+        
+        self.close()
+        
+        
+    def add_batch(self, my_batch):
+        
+        # Buffer the per-seed results of a BatchCardGame, writing full chunks
+        records = np.empty(len(my_batch.seeds), dtype = self.record_dtype)
+        if self.store_seeds:
+            records['seed'] = my_batch.seeds
+        else:
+            records['board'] = my_batch.permutations_matrix
+        records['solvable'] = my_batch.solvable
+        records['longest_cycle'] = my_batch.longest_cycle
+        records['valid_swaps_count'] = my_batch.valid_swaps_count
+        records['minimal_swap_number'] = my_batch.minimal_swap_number
+        self.add_records(records)
+        
+        
+    def add_results(self, game_results):
+        
+        # Buffer a list of GameResult records, writing full chunks
+        records = np.empty(len(game_results), dtype = self.record_dtype)
+        for i, game_result in enumerate(game_results):
+            if self.store_seeds:
+                records['seed'][i] = game_result.fixed_seed
+            else:
+                records['board'][i] = get_permutation_array(self.number_of_cards, game_result.fixed_seed)
+            records['solvable'][i] = game_result.solved
+            records['longest_cycle'][i] = game_result.longest_cycle
+            records['valid_swaps_count'][i] = game_result.valid_swaps_count
+            records['minimal_swap_number'][i] = game_result.minimal_swap_number
+        self.add_records(records)
+        
+        
+    def add_records(self, records):
+        
+        self.buffered_records.append(records)
+        self.number_of_buffered_records += len(records)
+        while self.number_of_buffered_records >= self.chunk_size:
+            self.write_chunk(self.chunk_size)
+            
+            
+    def write_chunk(self, number_of_records):
+        
+        # Write the first number_of_records buffered rows to a new chunk file
+        buffered_records = np.concatenate(self.buffered_records)
+        chunk_records = buffered_records[:number_of_records]
+        self.buffered_records = [buffered_records[number_of_records:]]
+        self.number_of_buffered_records -= len(chunk_records)
+        chunk_path = "{}_{:05d}.{}".format(self.output_prefix, self.number_of_chunks, self.file_format)
+        if self.file_format == 'npy':
+            np.save(chunk_path, chunk_records)
+        else:
+            # Optional dependency, only needed for Parquet output
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            columns = {name: chunk_records[name] if chunk_records[name].ndim == 1 else list(chunk_records[name]) \
+                       for name in chunk_records.dtype.names}
+            pq.write_table(pa.table(columns), chunk_path)
+        self.number_of_chunks += 1
+        self.written_paths.append(chunk_path)
+        
+        
+    def close(self):
+        
+        # Write the remaining buffered rows
+        if self.number_of_buffered_records > 0:
+            self.write_chunk(self.number_of_buffered_records)
+            
+            
+def export_sweep_results(number_of_cards, first_seed, last_seed, output_prefix, batch_size = 2**16, chunk_size = 1000000, \
+                         file_format = 'npy', maximal_revealed_number = None, maximal_swap_number = 1):
+    
+    # Evaluate all seeds between first_seed and last_seed (included) in batches, and export per-seed results in chunks
+    with ResultExporter(output_prefix, number_of_cards, chunk_size = chunk_size, file_format = file_format) as my_exporter:
+        for batch_start in range(first_seed, last_seed + 1, batch_size):
+            batch_end = min(batch_start + batch_size - 1, last_seed)
+            my_batch = BatchCardGame(number_of_cards, list(range(batch_start, batch_end + 1)), maximal_revealed_number, maximal_swap_number)
+            my_exporter.add_batch(my_batch)
+    return my_exporter.written_paths
+
+
+def load_exported_results(paths):
+    
+    # Load and concatenate exported .npy chunks
+    return np.concatenate([np.load(path) for path in paths])
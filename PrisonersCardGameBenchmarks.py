@@ -0,0 +1,242 @@
+'''
+ABOUT
+'''
+
+# Author: Matthieu DE MARI
+# Email: matthieu.de.mari@gmail.com
+# Version: 1.0
+# Notes: Benchmarks for the PrisonersCardGame module, to be run from the command line, e.g.
+# python PrisonersCardGameBenchmarks.py all --output results.json
+# python PrisonersCardGameBenchmarks.py compare baseline.json results.json
+
+'''
+IMPORTS
+'''
+
+import argparse
+from contextlib import redirect_stderr, redirect_stdout
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+
+'''
+IMPORT BENCHMARK FUNCTIONS
+'''
+
+# Statements imported by a freshly spawned worker process, for each scenario
+import_scenarios = {
+    'numpy only': "import numpy",
+    'headless engine': "import PrisonersCardGame",
+    'engine with plotting and progress bars': "import PrisonersCardGame; import matplotlib.pyplot; import tqdm",
+}
+
+# Code run by the spawned process: time the imports, then report time, peak RSS and loaded plotting modules
+import_probe = """
+import json, resource, sys, time
+start_time = time.perf_counter()
+{statements}
+import_time = time.perf_counter() - start_time
+max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"import_time": import_time, "max_rss_kb": max_rss_kb, "matplotlib_loaded": "matplotlib" in sys.modules}}))
+"""
+
+
+def measure_import(statements, repeats = 5):
+    
+    # Spawn a fresh interpreter repeats times (as a worker process would be), and return median measurements
+    measurements = []
+    module_folder = os.path.dirname(os.path.abspath(__file__))
+    environment = dict(os.environ, PYTHONPATH = module_folder + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', import_probe.format(statements = statements)], cwd = module_folder, \
+                                env = environment, capture_output = True, text = True, check = True).stdout
+        measurements.append(json.loads(output))
+    return {"import_time": statistics.median([measurement["import_time"] for measurement in measurements]),
+            "max_rss_kb": statistics.median([measurement["max_rss_kb"] for measurement in measurements]),
+            "matplotlib_loaded": measurements[0]["matplotlib_loaded"]}
+
+
+def benchmark_imports(repeats = 5):
+    
+    # Measure import time and peak RSS of a spawned process, for each scenario
+    results = {}
+    for scenario, statements in import_scenarios.items():
+        results[scenario] = measure_import(statements, repeats = repeats)
+        print("{:<42} import time: {:7.1f} ms | peak RSS: {:7.1f} MB | matplotlib loaded: {}".format(scenario, \
+              1000*results[scenario]["import_time"], results[scenario]["max_rss_kb"]/1024, results[scenario]["matplotlib_loaded"]))
+    return results
+
+
+'''
+TIMING FUNCTIONS
+'''
+
+def measure_calls(function, arguments_list, repeats = 5):
+    
+    # Call function on every set of arguments, repeats times, and return the median time per call
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        for arguments in arguments_list:
+            function(*arguments)
+        timings.append((time.perf_counter() - start_time)/len(arguments_list))
+    seconds_per_call = statistics.median(timings)
+    return {"seconds_per_call": seconds_per_call, "calls_per_second": 1/seconds_per_call}
+
+
+def get_benchmark_seeds(number_of_cards, number_of_seeds, random_seed = 0):
+    
+    # Fixed pseudo-random seeds, so that all runs measure the same boards
+    random_generator = random.Random(random_seed)
+    return [random_generator.randint(1, math.factorial(number_of_cards)) for _ in range(number_of_seeds)]
+
+
+'''
+ENGINE BENCHMARK FUNCTIONS
+'''
+
+def benchmark_card_games(repeats = 5, number_of_seeds = 50):
+    
+    # Measure CardGame construction time per seed, with and without brute force and orbits investigation
+    from PrisonersCardGame import CardGame
+    results = {}
+    for number_of_cards in [4, 8, 16, 32]:
+        seeds = get_benchmark_seeds(number_of_cards, number_of_seeds)
+        for try_brute_force in [True, False]:
+            for investigate_orbits in [True, False]:
+                name = "CardGame n={} brute_force={} orbits={}".format(number_of_cards, try_brute_force, investigate_orbits)
+                create_game = lambda fixed_seed: CardGame(number_of_cards = number_of_cards, fixed_seed = fixed_seed, \
+                                                          try_brute_force = try_brute_force, investigate_orbits = investigate_orbits, \
+                                                          print_val = False)
+                results[name] = measure_calls(create_game, [(fixed_seed,) for fixed_seed in seeds], repeats = repeats)
+                print_result(name, results[name], "games")
+    return results
+
+
+def benchmark_permutations(repeats = 5, number_of_seeds = 10000):
+    
+    # Measure get_nth_permutation throughput (and consecutive decoding with the codec, for comparison)
+    from PrisonersCardGame import get_nth_permutation
+    from PermutationCodec import iterate_permutations
+    results = {}
+    for number_of_cards in [8, 16, 32]:
+        sequence = list(range(number_of_cards))
+        seeds = get_benchmark_seeds(number_of_cards, number_of_seeds)
+        name = "get_nth_permutation n={}".format(number_of_cards)
+        results[name] = measure_calls(get_nth_permutation, [(sequence, fixed_seed) for fixed_seed in seeds], repeats = repeats)
+        print_result(name, results[name], "permutations")
+        name = "iterate_permutations n={}".format(number_of_cards)
+        iterate_all = lambda: sum(1 for _ in iterate_permutations(sequence, seeds[0], number_of_seeds))
+        timing = measure_calls(iterate_all, [()], repeats = repeats)
+        results[name] = {"seconds_per_call": timing["seconds_per_call"]/number_of_seeds, \
+                         "calls_per_second": timing["calls_per_second"]*number_of_seeds}
+        print_result(name, results[name], "permutations")
+    return results
+
+
+def benchmark_checkers(repeats = 3):
+    
+    # Measure BruteForceChecker throughput (seeds per second), with and without the cycle type cache, and in Heap's order
+    from PrisonersCardGame import BruteForceChecker, CycleTypeCache
+    results = {}
+    for number_of_cards in [4, 8]:
+        for sweep_order, use_cycle_type_cache in [('seed', False), ('seed', True), ('heap', False)]:
+            name = "BruteForceChecker n={} cycle_type_cache={}".format(number_of_cards, use_cycle_type_cache)
+            if sweep_order != 'seed':
+                name = "BruteForceChecker n={} sweep_order={}".format(number_of_cards, sweep_order)
+            # Silence progress bars and final displays, and start from an empty cache every time
+            def run_checker():
+                with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+                    BruteForceChecker(number_of_cards, use_cycle_type_cache = use_cycle_type_cache, cycle_type_cache = CycleTypeCache(), \
+                                      sweep_order = sweep_order)
+            timing = measure_calls(run_checker, [()], repeats = repeats)
+            number_of_seeds = math.factorial(number_of_cards)
+            results[name] = {"seconds_per_call": timing["seconds_per_call"]/number_of_seeds, \
+                             "calls_per_second": timing["calls_per_second"]*number_of_seeds}
+            print_result(name, results[name], "seeds")
+    return results
+
+
+def print_result(name, result, unit):
+    
+    print("{:<60} {:12.2f} us per call | {:14.1f} {} per second".format(name, 1e6*result["seconds_per_call"], \
+          result["calls_per_second"], unit))
+
+
+'''
+RESULTS FUNCTIONS
+'''
+
+def get_metadata():
+    
+    # Describe the run, so that results saved for different commits can be compared
+    module_folder = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd = module_folder, capture_output = True, text = True, \
+                                check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import numpy
+    return {"commit": commit,
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python_version": platform.python_version(),
+            "numpy_version": numpy.__version__,
+            "platform": platform.platform()}
+
+
+def compare_results(baseline_path, results_path):
+    
+    # Print the speedup of every benchmark found in both result files (> 1 means faster than the baseline)
+    with open(baseline_path, 'r') as baseline_file:
+        baseline = json.load(baseline_file)
+    with open(results_path, 'r') as results_file:
+        results = json.load(results_file)
+    print("Baseline commit: {} | compared commit: {}".format(baseline["metadata"]["commit"], results["metadata"]["commit"]))
+    speedups = {}
+    for name, result in results["results"].items():
+        if name in baseline["results"] and "seconds_per_call" in result:
+            speedups[name] = baseline["results"][name]["seconds_per_call"]/result["seconds_per_call"]
+            print("{:<60} speedup: {:8.2f}x".format(name, speedups[name]))
+    return speedups
+
+
+'''
+COMMAND LINE INTERFACE
+'''
+
+def main(arguments = None):
+    
+    parser = argparse.ArgumentParser(description = "Benchmarks for the prisoners card game.")
+    parser.add_argument('benchmark', choices = ['imports', 'games', 'permutations', 'checkers', 'all', 'compare'], \
+                        help = "Benchmark to run (or 'compare', to compare two saved result files).")
+    parser.add_argument('paths', nargs = '*', help = "Baseline and compared result files (for 'compare' only).")
+    parser.add_argument('--repeats', type = int, default = 5, help = "Number of repetitions (median is reported).")
+    parser.add_argument('--output', default = None, help = "Optional JSON file to save results to.")
+    arguments = parser.parse_args(arguments)
+    if arguments.benchmark == 'compare':
+        assert len(arguments.paths) == 2, "Two result files should be given: baseline and compared."
+        return compare_results(*arguments.paths)
+    # Run the requested benchmarks
+    benchmarks = {'imports': benchmark_imports, 'games': benchmark_card_games, 'permutations': benchmark_permutations, \
+                  'checkers': benchmark_checkers}
+    results = {}
+    for benchmark, run_benchmark in benchmarks.items():
+        if arguments.benchmark in [benchmark, 'all']:
+            results.update(run_benchmark(repeats = arguments.repeats))
+    results = {"metadata": get_metadata(), "results": results}
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(results, output_file, indent = 2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
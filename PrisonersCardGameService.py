@@ -0,0 +1,449 @@
+'''
+ABOUT
+'''
+
+# Author: Matthieu DE MARI
+# Email: matthieu.de.mari@gmail.com
+# Version: 1.0
+# Notes: Long-lived service answering solvability queries, as JSON lines, e.g.
+# python PrisonersCardGameService.py serve --port 8765 --warm-up 8 32
+# python PrisonersCardGameService.py stdio
+# python PrisonersCardGameService.py load-test --number-of-queries 20000 --concurrency 64
+# A query gives a deck size and either a seed or a board (zero-based card index at each position), e.g.
+# {"id": 1, "number_of_cards": 32, "seed": 152} or {"id": 2, "number_of_cards": 4, "board": [1, 0, 3, 2]},
+# optionally with "maximal_revealed_number", "maximal_swap_number" and "swaps" (false to skip the list of solving swaps).
+# Queries with more than max_number_of_cards cards, and lines longer than max_line_length bytes, only get an error answer.
+# Concurrent queries are answered together, with one vectorized evaluation per set of game rules.
+
+'''
+IMPORTS
+'''
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import sys
+import time
+import numpy as np
+from PrisonersCardGame import LRUCache, NeighbourEvaluator, evaluate_permutations_matrix, get_game_rules, get_permutation_dtype, \
+                              get_permutations_matrix, search_swap_sequences
+
+
+'''
+SOLVABILITY_SERVICE CUSTOM CLASS
+'''
+
+class SolvabilityService():
+    
+    def __init__(self, max_batch_size = 1024, max_batch_delay = 0, answer_cache_size = 65536, max_number_of_cards = 256):
+        
+        # Maximal number of queries answered together, and maximal time (in seconds) spent waiting for more queries
+        # once one has arrived (0 only groups the queries already waiting)
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        # Largest deck size answered (evaluating a board builds several number_of_cards x number_of_cards matrices,
+        # and blocks the event loop for all clients meanwhile)
+        self.max_number_of_cards = max_number_of_cards
+        # Recent answers (least recently used ones are evicted first)
+        self.answer_cache = LRUCache(max_size = answer_cache_size)
+        # Queue of (query, future) pairs, and task answering them (created by start)
+        self.queue = None
+        self.batch_task = None
+        # Counters
+        self.number_of_queries = 0
+        self.number_of_batches = 0
+        
+        
+    def warm_up(self, numbers_of_cards):
+        
+        # Run one query per deck size, so that the first real queries do not pay for first calls
+        self.answer_queries([{"number_of_cards": number_of_cards, "seed": 1} for number_of_cards in numbers_of_cards])
+        
+        
+    def answer_queries(self, queries):
+        
+        # Answer a list of queries (in order), evaluating all boards of the same game rules at once
+        answers = [None]*len(queries)
+        groups = {}
+        for index, query in enumerate(queries):
+            # Any invalid query only gets an error answer
+            try:
+                key, rules = self.parse_query(query)
+            except Exception as error:
+                answers[index] = {"error": "Invalid query: {!r}".format(error)}
+                continue
+            cached_answer = self.answer_cache.get(key)
+            if cached_answer is not None:
+                answers[index] = self.format_answer(cached_answer)
+            else:
+                groups.setdefault(rules, []).append((index, key))
+        for rules, group in groups.items():
+            try:
+                group_answers = self.evaluate_group(rules, [key for _, key in group])
+            except Exception as error:
+                for index, _ in group:
+                    answers[index] = {"error": "Evaluation failed: {!r}".format(error)}
+                continue
+            for (index, key), answer in zip(group, group_answers):
+                self.answer_cache.put(key, answer)
+                answers[index] = self.format_answer(answer)
+        # Echo query ids
+        for query, answer in zip(queries, answers):
+            if isinstance(query, dict) and "id" in query:
+                answer["id"] = query["id"]
+        self.number_of_queries += len(queries)
+        self.number_of_batches += 1
+        return answers
+        
+        
+    def parse_query(self, query):
+        
+        # Return the cache key of a query, and its game rules (number of cards, maximal revealed number, maximal swap number).
+        # Values must be JSON integers and booleans (e.g. true is not a seed, and "false" does not skip swaps).
+        assert isinstance(query, dict), "The query should be a JSON object."
+        number_of_cards = query.get("number_of_cards")
+        assert is_integer(number_of_cards) and number_of_cards >= 1, "The number of cards should be a positive integer."
+        assert number_of_cards <= self.max_number_of_cards, "The number of cards should be at most {}.".format(self.max_number_of_cards)
+        maximal_revealed_number = query.get("maximal_revealed_number")
+        maximal_swap_number = query.get("maximal_swap_number", 1)
+        assert maximal_revealed_number is None or is_integer(maximal_revealed_number), \
+               "The maximal number of revealed cards should be an integer."
+        assert is_integer(maximal_swap_number), "The maximal number of swaps should be an integer."
+        # Same defaults and bounds as the games
+        rules = get_game_rules(number_of_cards, maximal_revealed_number, maximal_swap_number)
+        include_swaps = query.get("swaps", True)
+        assert isinstance(include_swaps, bool), "The swaps flag should be a boolean."
+        if "seed" in query:
+            seed = query["seed"]
+            max_number_mixes = math.factorial(number_of_cards)
+            assert is_integer(seed) and 1 <= seed <= max_number_mixes, \
+                   "The seed should be an integer between 1 and {}".format(max_number_mixes)
+            return (rules, 'seed', seed, include_swaps), rules
+        assert "board" in query, "The query should give a seed or a board."
+        assert isinstance(query["board"], list) and all(is_integer(card) for card in query["board"]), \
+               "The board should be a list of integers."
+        board = tuple(query["board"])
+        assert sorted(board) == list(range(number_of_cards)), \
+               "The board should contain each card index between 0 and {} once.".format(number_of_cards - 1)
+        return (rules, 'board', board, include_swaps), rules
+        
+        
+    def evaluate_group(self, rules, keys):
+        
+        # Decode all seeds at once, stack them with the given boards, and evaluate all boards in a single pass.
+        # Boards and swaps are kept as arrays (see format_answer), so that cached answers hold few objects for the garbage collector.
+        number_of_cards, maximal_revealed_number, maximal_swap_number = rules
+        seed_rows = [row for row, key in enumerate(keys) if key[1] == 'seed']
+        board_rows = [row for row, key in enumerate(keys) if key[1] == 'board']
+        permutations_matrix = np.empty((len(keys), number_of_cards), dtype = get_permutation_dtype(number_of_cards))
+        if len(seed_rows) > 0:
+            permutations_matrix[seed_rows] = get_permutations_matrix(number_of_cards, [keys[row][2] for row in seed_rows])
+        if len(board_rows) > 0:
+            permutations_matrix[board_rows] = [keys[row][2] for row in board_rows]
+        solvable, longest_cycle, valid_swaps_count, minimal_swap_number = \
+            evaluate_permutations_matrix(permutations_matrix, maximal_revealed_number, maximal_swap_number)
+        answers = []
+        for row, key in enumerate(keys):
+            answer = {"number_of_cards": number_of_cards,
+                      "maximal_revealed_number": maximal_revealed_number,
+                      "maximal_swap_number": maximal_swap_number,
+                      "board": permutations_matrix[row].copy(),
+                      "solvable": bool(solvable[row]),
+                      "longest_cycle": int(longest_cycle[row]),
+                      "valid_swaps_count": int(valid_swaps_count[row]),
+                      "minimal_swap_number": int(minimal_swap_number[row])}
+            if key[1] == 'seed':
+                answer["seed"] = key[2]
+            # Solving swaps (one-based positions, [1, 1] meaning no swap) and, with several swaps allowed, a solving sequence
+            if key[3]:
+                answer["solving_swaps"] = NeighbourEvaluator(permutations_matrix[row]).get_solving_swaps_array(maximal_revealed_number) \
+                                          if valid_swaps_count[row] > 0 else np.zeros((0, 2), dtype = np.int64)
+                if maximal_swap_number > 1:
+                    solving_swap_sequence = next(search_swap_sequences(permutations_matrix[row], maximal_revealed_number, \
+                                                                       maximal_swap_number), None)
+                    answer["solving_swap_sequence"] = solving_swap_sequence
+            answers.append(answer)
+        return answers
+        
+        
+    def format_answer(self, answer):
+        
+        # JSON serializable copy of an answer
+        formatted_answer = dict(answer)
+        formatted_answer["board"] = answer["board"].tolist()
+        if "solving_swaps" in answer:
+            formatted_answer["solving_swaps"] = answer["solving_swaps"].tolist()
+        if answer.get("solving_swap_sequence") is not None:
+            formatted_answer["solving_swap_sequence"] = [list(swap) for swap in answer["solving_swap_sequence"]]
+        return formatted_answer
+        
+        
+    async def start(self):
+        
+        # Start answering queued queries
+        self.queue = asyncio.Queue()
+        self.batch_task = asyncio.create_task(self.answer_batches())
+        
+        
+    async def stop(self):
+        
+        self.batch_task.cancel()
+        try:
+            await self.batch_task
+        except asyncio.CancelledError:
+            pass
+        
+        
+    async def submit(self, query):
+        
+        # Queue a query, and wait for its answer
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, future))
+        return await future
+        
+        
+    async def answer_batches(self):
+        
+        # Wait for a query, group it with the ones queued meanwhile (waiting at most max_batch_delay for more), answer them all
+        while True:
+            batch = [await self.queue.get()]
+            # Any failure only answers the current batch with errors, and the service keeps running
+            try:
+                deadline = time.monotonic() + self.max_batch_delay
+                while len(batch) < self.max_batch_size:
+                    if not self.queue.empty():
+                        batch.append(self.queue.get_nowait())
+                        continue
+                    remaining_delay = deadline - time.monotonic()
+                    if remaining_delay <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining_delay))
+                    except asyncio.TimeoutError:
+                        break
+                answers = self.answer_queries([query for query, _ in batch])
+            except Exception as error:
+                answers = [{"error": "Service failure: {!r}".format(error)} for _ in batch]
+                for (query, _), answer in zip(batch, answers):
+                    if isinstance(query, dict) and "id" in query:
+                        answer["id"] = query["id"]
+            for (_, future), answer in zip(batch, answers):
+                if not future.done():
+                    future.set_result(answer)
+
+
+def is_integer(value):
+    
+    # JSON integer (booleans are integers in Python, but not valid counts, seeds or cards)
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+'''
+SERVER FUNCTIONS
+'''
+
+async def handle_connection(service, reader, writer, max_line_length = 2**16):
+    
+    # Answer each JSON line as soon as possible (answers may come back out of order, and carry the id of their query).
+    # Every line gets an answer, invalid or too long lines getting an error answer.
+    async def answer_line(line):
+        try:
+            answer = await service.submit(json.loads(line))
+        except ValueError as error:
+            # Invalid JSON, or invalid UTF-8
+            answer = {"error": "Invalid JSON: {}".format(error)}
+        except Exception as error:
+            answer = {"error": "Service failure: {!r}".format(error)}
+        writer.write((json.dumps(answer) + '\n').encode())
+    
+    pending_tasks = set()
+    try:
+        while True:
+            line = await read_line(reader)
+            if line is None:
+                writer.write((json.dumps({"error": "Line too long: at most {} bytes are read.".format(max_line_length)}) + '\n').encode())
+            elif not line:
+                break
+            elif line.strip():
+                task = asyncio.create_task(answer_line(line))
+                pending_tasks.add(task)
+                task.add_done_callback(pending_tasks.discard)
+            await writer.drain()
+        if len(pending_tasks) > 0:
+            await asyncio.gather(*pending_tasks)
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def read_line(reader):
+    
+    # Return the next line (empty at the end of the stream), or None if it is longer than the reader limit,
+    # in which case the rest of the line is skipped
+    try:
+        return await reader.readuntil(b'\n')
+    except asyncio.IncompleteReadError as error:
+        # Last line, without a line break
+        return error.partial
+    except asyncio.LimitOverrunError:
+        pass
+    while True:
+        try:
+            await reader.readuntil(b'\n')
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as error:
+            await reader.readexactly(max(error.consumed, 1))
+
+
+async def start_server(service, host = '127.0.0.1', port = 8765, max_line_length = 2**20):
+    
+    # Start the service and a JSON lines server on a local socket (port 0 picks a free port)
+    await service.start()
+    return await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer, max_line_length), host, port, \
+                                      limit = max_line_length)
+
+
+async def serve(host = '127.0.0.1', port = 8765, numbers_of_cards_to_warm_up = (), max_batch_size = 1024, max_batch_delay = 0, \
+                max_number_of_cards = 256, max_line_length = 2**20):
+    
+    # Serve forever
+    service = SolvabilityService(max_batch_size = max_batch_size, max_batch_delay = max_batch_delay, max_number_of_cards = max_number_of_cards)
+    service.warm_up(numbers_of_cards_to_warm_up)
+    server = await start_server(service, host, port, max_line_length)
+    print("Serving solvability queries on {}:{}.".format(*server.sockets[0].getsockname()[:2]), file = sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def serve_stdio(numbers_of_cards_to_warm_up = (), max_number_of_cards = 256):
+    
+    # Answer JSON lines read from stdin on stdout, one at a time (for tools driving the service through a pipe).
+    # Lines are read as bytes, so that invalid UTF-8 only gets an error answer.
+    service = SolvabilityService(max_number_of_cards = max_number_of_cards)
+    service.warm_up(numbers_of_cards_to_warm_up)
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            answer = service.answer_queries([json.loads(line)])[0]
+        except ValueError as error:
+            answer = {"error": "Invalid JSON: {}".format(error)}
+        print(json.dumps(answer), flush = True)
+
+
+'''
+LOAD TEST FUNCTIONS
+'''
+
+def get_load_test_queries(number_of_queries, number_of_cards, board_fraction = 0.1, random_seed = 0):
+    
+    # Random seed queries, and a fraction of random board queries
+    random_generator = random.Random(random_seed)
+    max_number_mixes = math.factorial(number_of_cards)
+    queries = []
+    for query_id in range(number_of_queries):
+        if random_generator.random() < board_fraction:
+            board = list(range(number_of_cards))
+            random_generator.shuffle(board)
+            queries.append({"id": query_id, "number_of_cards": number_of_cards, "board": board})
+        else:
+            queries.append({"id": query_id, "number_of_cards": number_of_cards, "seed": random_generator.randint(1, max_number_mixes)})
+    return queries
+
+
+async def run_load_test(host, port, queries, concurrency = 64):
+    
+    # Send the queries over concurrency connections, each waiting for an answer before sending its next query,
+    # and report latency percentiles (in milliseconds) and throughput
+    latencies = []
+    number_of_errors = 0
+    async def run_client(client_queries):
+        nonlocal number_of_errors
+        reader, writer = await asyncio.open_connection(host, port)
+        for query in client_queries:
+            start_time = time.perf_counter()
+            writer.write((json.dumps(query) + '\n').encode())
+            await writer.drain()
+            answer = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start_time)
+            number_of_errors += "error" in answer
+        writer.close()
+        await writer.wait_closed()
+    
+    start_time = time.perf_counter()
+    await asyncio.gather(*[run_client(queries[client::concurrency]) for client in range(concurrency)])
+    total_time = time.perf_counter() - start_time
+    percentiles = statistics.quantiles(latencies, n = 100) if len(latencies) > 1 else latencies*99
+    return {"number_of_queries": len(latencies),
+            "concurrency": concurrency,
+            "number_of_errors": number_of_errors,
+            "queries_per_second": len(latencies)/total_time,
+            "mean_latency_ms": 1e3*statistics.mean(latencies),
+            "p50_latency_ms": 1e3*percentiles[49],
+            "p99_latency_ms": 1e3*percentiles[98]}
+
+
+async def run_local_load_test(queries, concurrency = 64, max_batch_size = 1024, max_batch_delay = 0):
+    
+    # Run the load test against an in-process server, on a free local port
+    service = SolvabilityService(max_batch_size = max_batch_size, max_batch_delay = max_batch_delay)
+    service.warm_up(sorted(set(query["number_of_cards"] for query in queries)))
+    server = await start_server(service, '127.0.0.1', 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    async with server:
+        results = await run_load_test(host, port, queries, concurrency)
+    await service.stop()
+    results["average_batch_size"] = service.number_of_queries/max(service.number_of_batches, 1)
+    return results
+
+
+'''
+COMMAND LINE INTERFACE
+'''
+
+def main(arguments = None):
+    
+    parser = argparse.ArgumentParser(description = "Solvability service for the prisoners card game.")
+    parser.add_argument('mode', choices = ['serve', 'stdio', 'load-test'], help = "Serve on a local socket, on stdin/stdout, or load test.")
+    parser.add_argument('--host', default = '127.0.0.1', help = "Host to serve on (or to load test).")
+    parser.add_argument('--port', type = int, default = None, help = "Port to serve on (or to load test, an in-process server being used if none).")
+    parser.add_argument('--warm-up', type = int, nargs = '*', default = [], help = "Numbers of cards to warm up the service for.")
+    parser.add_argument('--max-batch-size', type = int, default = 1024, help = "Maximal number of queries answered together.")
+    parser.add_argument('--max-batch-delay', type = float, default = 0, help = "Maximal time (in seconds) spent waiting for more queries.")
+    parser.add_argument('--max-number-of-cards', type = int, default = 256, help = "Largest number of cards answered.")
+    parser.add_argument('--max-line-length', type = int, default = 2**20, help = "Longest query line (in bytes) read from a socket.")
+    parser.add_argument('--number-of-queries', type = int, default = 10000, help = "Number of load test queries.")
+    parser.add_argument('--number-of-cards', type = int, default = 32, help = "Number of cards in load test queries.")
+    parser.add_argument('--concurrency', type = int, default = 64, help = "Number of concurrent load test connections.")
+    parser.add_argument('--output', default = None, help = "Optional JSON file to save load test results to.")
+    arguments = parser.parse_args(arguments)
+    if arguments.mode == 'serve':
+        asyncio.run(serve(arguments.host, 8765 if arguments.port is None else arguments.port, arguments.warm_up, \
+                          arguments.max_batch_size, arguments.max_batch_delay, arguments.max_number_of_cards, arguments.max_line_length))
+        return None
+    if arguments.mode == 'stdio':
+        serve_stdio(arguments.warm_up, arguments.max_number_of_cards)
+        return None
+    # Load test
+    queries = get_load_test_queries(arguments.number_of_queries, arguments.number_of_cards)
+    if arguments.port is None:
+        results = asyncio.run(run_local_load_test(queries, arguments.concurrency, arguments.max_batch_size, arguments.max_batch_delay))
+    else:
+        results = asyncio.run(run_load_test(arguments.host, arguments.port, queries, arguments.concurrency))
+    for name, value in results.items():
+        print("{:<25} {}".format(name, round(value, 3) if isinstance(value, float) else value))
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as output_file:
+            json.dump(results, output_file, indent = 2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+'''
+ABOUT
+'''
+
+# Author: Matthieu DE MARI
+# Email: matthieu.de.mari@gmail.com
+# Version: 1.0
+# Notes: Exhaustive checks of the PermutationCodec module, to be run with pytest.
+# Every function should be bit-for-bit compatible with get_nth_permutation, ranks being taken modulo n!.
+
+'''
+IMPORTS
+'''
+
+import math
+import pytest
+from PermutationCodec import iterate_permutations, rank_permutation, unrank_permutation
+from PrisonersCardGame import get_nth_permutation, get_permutation_array
+
+
+'''
+CODEC TESTS
+'''
+
+@pytest.mark.parametrize('number_of_elements', range(1, 9))
+def test_codec_matches_get_nth_permutation(number_of_elements):
+    
+    # All ranks, up to and including the wrap-around at n!
+    seq = list(range(number_of_elements))
+    max_rank = math.factorial(number_of_elements)
+    expected_permutations = [get_nth_permutation(seq, rank) for rank in range(max_rank + 1)]
+    assert [unrank_permutation(seq, rank) for rank in range(max_rank + 1)] == expected_permutations
+    assert [rank_permutation(permutation, seq) for permutation in expected_permutations] == list(range(max_rank)) + [0]
+    assert list(iterate_permutations(seq, 0, max_rank + 1)) == expected_permutations
+    assert [get_permutation_array(number_of_elements, rank).tolist() for rank in range(1, max_rank + 1)] == expected_permutations[1:]
+
+
+@pytest.mark.parametrize('number_of_elements', [5, 8])
+def test_iterate_permutations_from_any_rank(number_of_elements):
+    
+    # Walks starting anywhere (including just before n!) and going past n!, on elements other than integers
+    seq = ['C{}'.format(i + 1) for i in range(number_of_elements)]
+    max_rank = math.factorial(number_of_elements)
+    for first_rank in [1, 7, max_rank//2 + 3, max_rank - 2, max_rank, 2*max_rank + 5]:
+        expected_permutations = [get_nth_permutation(seq, rank) for rank in range(first_rank, first_rank + 30)]
+        assert list(iterate_permutations(seq, first_rank, 30)) == expected_permutations
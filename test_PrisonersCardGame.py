@@ -0,0 +1,178 @@
+'''
+ABOUT
+'''
+
+# Author: Matthieu DE MARI
+# Email: matthieu.de.mari@gmail.com
+# Version: 1.0
+# Notes: Exhaustive checks of the PrisonersCardGame module, to be run with pytest.
+# Every check compares against a brute force reference, playing each swap on a copy of the board
+# and following the pointers for every target card.
+
+'''
+IMPORTS
+'''
+
+import math
+import pytest
+import numpy as np
+from PrisonersCardGame import BatchCardGame, BruteForceChecker, CardGame, CycleTypeCache, MonteCarloEstimator, PartitionCounter, \
+                              check_orbit_proposals_against_brute_force, export_sweep_results, is_permutation_solvable, \
+                              is_permutation_solvable_by_simulation, load_exported_results, search_swap_sequences
+
+
+'''
+GAME RULES TESTS
+'''
+
+@pytest.mark.parametrize('create', [lambda rules: CardGame(number_of_cards = 6, fixed_seed = 1, print_val = False, **rules),
+                                    lambda rules: BruteForceChecker(6, cycle_type_cache = CycleTypeCache(), **rules),
+                                    lambda rules: PartitionCounter(6, print_val = False, cycle_type_cache = CycleTypeCache(), **rules),
+                                    lambda rules: BatchCardGame(6, [1, 2, 3], **rules),
+                                    lambda rules: MonteCarloEstimator(6, max_samples = 10, print_val = False, **rules)])
+@pytest.mark.parametrize('rules', [{"maximal_revealed_number": 0}, {"maximal_revealed_number": 2.5}, {"maximal_swap_number": -1}])
+def test_invalid_game_rules_are_rejected(create, rules):
+    
+    with pytest.raises(AssertionError):
+        create(rules)
+
+
+def test_single_card_games_reveal_one_card():
+    
+    # Half of one card rounds down to 0, but at least one card is revealed by default
+    assert CardGame(number_of_cards = 1, fixed_seed = 1, print_val = False).solved
+    assert PartitionCounter(1, print_val = False, cycle_type_cache = CycleTypeCache()).success_rate == 1
+    assert MonteCarloEstimator(1, max_samples = 10, print_val = False).success_rate == 1
+
+
+'''
+CYCLE VERIFIER TESTS
+'''
+
+@pytest.mark.parametrize('number_of_cards', [4, 8])
+def test_cycle_verifiers_match_simulation(number_of_cards):
+    
+    # Differential check, over all seeds and all swaps, of the cycle decomposition verifier, of the neighbour evaluator
+    # and of the swaps found by the game (from the neighbour evaluator), against the pointer-following simulation
+    for fixed_seed in range(1, math.factorial(number_of_cards) + 1):
+        my_game = CardGame(number_of_cards = number_of_cards, fixed_seed = fixed_seed, investigate_orbits = False, print_val = False, \
+                           lazy = True)
+        maximal_revealed_number = my_game.maximal_revealed_number
+        longest_cycle_matrix = my_game.neighbour_evaluator.longest_cycle_matrix
+        simulation_swaps = []
+        for swap in [(1, 1)] + [(i, j) for i in range(1, number_of_cards + 1) for j in range(i + 1, number_of_cards + 1)]:
+            my_game.swap_board(*swap)
+            solved_by_simulation = is_permutation_solvable_by_simulation(my_game.board_permutation, maximal_revealed_number)
+            assert is_permutation_solvable(my_game.board_permutation, maximal_revealed_number) == solved_by_simulation, (fixed_seed, swap)
+            assert (longest_cycle_matrix[swap[0] - 1, swap[1] - 1] <= maximal_revealed_number) == solved_by_simulation, (fixed_seed, swap)
+            if solved_by_simulation:
+                simulation_swaps.append(swap)
+        assert my_game.solving_swap_list == simulation_swaps, fixed_seed
+
+
+'''
+ORBIT PROPOSALS TESTS
+'''
+
+@pytest.mark.parametrize('number_of_cards, maximal_revealed_number', [(4, None), (8, None), (7, 3), (6, 2)])
+def test_orbit_proposals_match_brute_force(number_of_cards, maximal_revealed_number):
+    
+    # Proposed swaps should be exactly the brute force swaps, for every seed
+    assert check_orbit_proposals_against_brute_force(number_of_cards, maximal_revealed_number)
+
+
+'''
+PARTITION COUNTER TESTS
+'''
+
+@pytest.mark.parametrize('number_of_cards, maximal_revealed_number', [(4, None), (8, None), (7, 3), (6, 2), (5, 2)])
+def test_partition_counts_match_brute_force(number_of_cards, maximal_revealed_number):
+    
+    # Counts over cycle types should match the counts obtained by playing every swap of every configuration
+    my_counter = PartitionCounter(number_of_cards, print_val = False, cycle_type_cache = CycleTypeCache(), \
+                                  maximal_revealed_number = maximal_revealed_number)
+    assert my_counter.cross_check_with_brute_force()
+
+
+'''
+SWAP SEQUENCE TESTS
+'''
+
+@pytest.mark.parametrize('number_of_cards, maximal_revealed_number, maximal_swap_number', [(7, 2, 3), (8, 3, 2)])
+def test_swap_sequences_are_shortest_first(number_of_cards, maximal_revealed_number, maximal_swap_number):
+    
+    # Sequences should solve the board, the first one using as few swaps as possible, and longer ones coming later
+    for fixed_seed in range(1, math.factorial(number_of_cards) + 1, 11):
+        my_game = CardGame(number_of_cards = number_of_cards, fixed_seed = fixed_seed, investigate_orbits = False, print_val = False, \
+                           maximal_revealed_number = maximal_revealed_number, maximal_swap_number = maximal_swap_number, lazy = True)
+        swap_sequences = list(search_swap_sequences(my_game.original_permutation, maximal_revealed_number, maximal_swap_number))
+        minimal_swap_number = my_game.cycle_type_statistics["minimal_swap_number"]
+        if minimal_swap_number > maximal_swap_number:
+            assert swap_sequences == [] and my_game.solving_swap_sequence is None and not my_game.solved, fixed_seed
+            continue
+        assert my_game.solving_swap_sequence == swap_sequences[0] and len(swap_sequences[0]) == minimal_swap_number, fixed_seed
+        assert [len(swap_sequence) for swap_sequence in swap_sequences] == sorted(len(swap_sequence) for swap_sequence in swap_sequences)
+        for swap_sequence in swap_sequences:
+            board = my_game.original_permutation.copy()
+            for i, j in swap_sequence:
+                board[[i - 1, j - 1]] = board[[j - 1, i - 1]]
+            assert is_permutation_solvable_by_simulation(board, maximal_revealed_number), (fixed_seed, swap_sequence)
+
+
+'''
+BRUTE FORCE CHECKER TESTS
+'''
+
+@pytest.mark.parametrize('number_of_cards, maximal_revealed_number, maximal_swap_number', [(7, None, 1), (7, 3, 1), (7, 2, 2), (6, None, 0)])
+def test_heap_order_sweep_matches_seed_order_sweep(number_of_cards, maximal_revealed_number, maximal_swap_number):
+    
+    # Both sweep orders should give the same verdict, first counterexample seed and aggregates
+    results = []
+    for sweep_order in ['seed', 'heap']:
+        my_checker = BruteForceChecker(number_of_cards, cycle_type_cache = CycleTypeCache(), maximal_revealed_number = maximal_revealed_number, \
+                                       maximal_swap_number = maximal_swap_number, sweep_order = sweep_order)
+        results.append((my_checker.boolean_checker, my_checker.first_counterexample_seed, my_checker.number_checked, \
+                        my_checker.number_solvable, my_checker.completed_ranges))
+    assert results[0] == results[1]
+
+
+'''
+CYCLE TYPE CACHE TESTS
+'''
+
+def test_cycle_type_cache_round_trips_through_json(tmp_path):
+    
+    # Statistics (from brute force and analytical) and orbit swap patterns should be restored as they were stored
+    cache_path = str(tmp_path/'cycle_types.json')
+    my_cache = CycleTypeCache(cache_path = cache_path)
+    for fixed_seed in range(1, 5040, 37):
+        CardGame(number_of_cards = 7, fixed_seed = fixed_seed, print_val = False, cycle_type_cache = my_cache, maximal_revealed_number = 3)
+        CardGame(number_of_cards = 7, fixed_seed = fixed_seed, try_brute_force = False, print_val = False, cycle_type_cache = my_cache)
+    my_cache.save()
+    restored_cache = CycleTypeCache(cache_path = cache_path)
+    assert list(restored_cache.entries.items()) == list(my_cache.entries.items())
+    assert any(key[0] == 'orbit' for key in restored_cache.entries)
+
+
+'''
+RESULT RECORDS TESTS
+'''
+
+def test_game_results_are_hashable_values():
+    
+    # Equal records (from two games with the same seed) should be interchangeable in sets
+    results = {CardGame(number_of_cards = 8, fixed_seed = fixed_seed, print_val = False).get_result() for fixed_seed in [152, 152, 153]}
+    assert len(results) == 2
+
+
+def test_parquet_export_matches_npy_export(tmp_path):
+    
+    # Both chunk formats should hold the same columns and rows (Parquet output needs the optional pyarrow dependency)
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    npy_paths = export_sweep_results(6, 1, 720, str(tmp_path/'sweep'), batch_size = 100, chunk_size = 250)
+    parquet_paths = export_sweep_results(6, 1, 720, str(tmp_path/'sweep'), batch_size = 100, chunk_size = 250, file_format = 'parquet')
+    assert len(parquet_paths) == len(npy_paths) == 3
+    npy_records = load_exported_results(npy_paths)
+    parquet_table = pyarrow_parquet.read_table(parquet_paths).to_pydict()
+    for name in npy_records.dtype.names:
+        assert np.array_equal(np.array(parquet_table[name]), npy_records[name]), name
@@ -0,0 +1,127 @@
+'''
+ABOUT
+'''
+
+# Author: Matthieu DE MARI
+# Email: matthieu.de.mari@gmail.com
+# Version: 1.0
+# Notes: Checks of the solvability service, to be run with pytest.
+
+'''
+IMPORTS
+'''
+
+import asyncio
+import io
+import json
+import sys
+import pytest
+from PrisonersCardGame import CardGame
+from PrisonersCardGameService import SolvabilityService, serve_stdio, start_server
+
+
+'''
+QUERY TESTS
+'''
+
+@pytest.mark.parametrize('query', [{"number_of_cards": 4, "seed": 1, "maximal_revealed_number": float('inf')},
+                                   {"number_of_cards": 4, "seed": True},
+                                   {"number_of_cards": 4, "seed": 1, "swaps": "false"},
+                                   {"number_of_cards": 4, "seed": 1, "maximal_swap_number": -1},
+                                   {"number_of_cards": 2, "board": [True, 0]},
+                                   {"number_of_cards": 4},
+                                   5])
+def test_invalid_queries_get_error_answers(query):
+    
+    # Invalid queries only get an error answer, and do not affect the other queries of the batch
+    my_service = SolvabilityService()
+    invalid_answer, valid_answer = my_service.answer_queries([query, {"id": 7, "number_of_cards": 4, "seed": 1}])
+    assert "error" in invalid_answer
+    assert valid_answer["id"] == 7 and valid_answer["seed"] == 1 and "error" not in valid_answer
+
+
+def test_answers_match_card_games():
+    
+    # Answers for seeds (and for the same boards, given directly) should match the game results
+    my_service = SolvabilityService()
+    for fixed_seed in range(1, 40321, 97):
+        my_game = CardGame(number_of_cards = 8, fixed_seed = fixed_seed, print_val = False, lazy = True)
+        for query in [{"number_of_cards": 8, "seed": fixed_seed}, {"number_of_cards": 8, "board": my_game.original_permutation.tolist()}]:
+            answer = my_service.answer_queries([query])[0]
+            assert answer["solvable"] == my_game.solved
+            assert [tuple(swap) for swap in answer["solving_swaps"]] == my_game.solving_swap_list
+
+
+'''
+SERVER TESTS
+'''
+
+def test_server_keeps_answering_after_a_failure():
+    
+    async def run_queries():
+        my_service = SolvabilityService()
+        # Fail the first batch only
+        answer_queries = my_service.answer_queries
+        failures = [RuntimeError('failure')]
+        def failing_answer_queries(queries):
+            if failures:
+                raise failures.pop()
+            return answer_queries(queries)
+        my_service.answer_queries = failing_answer_queries
+        server = await start_server(my_service, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        answers = []
+        for query_id in range(2):
+            writer.write((json.dumps({"id": query_id, "number_of_cards": 4, "seed": 1}) + '\n').encode())
+            await writer.drain()
+            answers.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        writer.close()
+        server.close()
+        await my_service.stop()
+        return answers
+    
+    failed_answer, answer = asyncio.run(run_queries())
+    assert "error" in failed_answer and failed_answer["id"] == 0
+    assert answer["id"] == 1 and answer["solvable"]
+
+
+def test_too_many_cards_get_an_error_answer():
+    
+    my_service = SolvabilityService(max_number_of_cards = 16)
+    answer, = my_service.answer_queries([{"number_of_cards": 17, "seed": 5}])
+    assert "error" in answer
+
+
+'''
+INPUT TESTS
+'''
+
+def test_server_answers_invalid_and_too_long_lines():
+    
+    async def run_lines(lines):
+        my_service = SolvabilityService()
+        server = await start_server(my_service, '127.0.0.1', 0, max_line_length = 1024)
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        answers = []
+        for line in lines:
+            writer.write(line)
+            await writer.drain()
+            answers.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+        writer.close()
+        server.close()
+        await my_service.stop()
+        return answers
+    
+    valid_line = (json.dumps({"id": 1, "number_of_cards": 4, "seed": 1}) + '\n').encode()
+    answers = asyncio.run(run_lines([b'\x80abc\n', valid_line, b'[' + b'0, '*10**5 + b'0]\n', valid_line]))
+    assert "error" in answers[0] and "error" in answers[2]
+    assert answers[1] == answers[3] and answers[1]["solvable"]
+
+
+def test_stdio_answers_invalid_lines(monkeypatch, capsys):
+    
+    lines = [b'\x80abc\n', b'{"number_of_cards": 4, "seed": 1}\n']
+    monkeypatch.setattr(sys, 'stdin', io.TextIOWrapper(io.BytesIO(b''.join(lines))))
+    serve_stdio()
+    answers = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert "error" in answers[0] and answers[1]["solvable"]